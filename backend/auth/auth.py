@@ -1,19 +1,42 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database.db import get_db
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from database.db import get_async_read_db
 from models.models import User
+import asyncio
+import threading
+import time
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "placement-analytics-secret-key-change-in-production-2024")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
+# The cache is per process: a commit that changes a user only drops the
+# entry in the worker that made it, so with --workers N the other workers
+# (and changes made by scripts) can serve the old role or active status for
+# up to AUTH_CACHE_TTL seconds. Set it to 0 to always read the users table.
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+# Read-only requests take id and role from the token itself when enabled, so
+# role changes and deactivation only reach them once the user's current token
+# expires, in every worker; routes that return the user still load the row
+AUTH_TRUST_TOKEN_ROLES = os.getenv("AUTH_TRUST_TOKEN_ROLES", "false").lower() in ("1", "true", "yes")
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Existing hashes with a different work factor are rehashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 hashes inline on the event loop (the old behaviour)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
@@ -25,6 +48,58 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated pool so logins never block the event
+    loop, and turns callers away once ``max_queue`` operations are waiting."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+
+    async def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in attempts in progress, please retry",
+                headers={"Retry-After": "2"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="bcrypt")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple:
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -32,29 +107,133 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    credentials_exception = HTTPException(
+def token_claims(user: User) -> dict:
+    return {"sub": user.username, "uid": user.id, "role": user.role}
+
+
+class PrincipalCache:
+    """Detached ``User`` rows by username, kept for a short TTL and dropped
+    as soon as a commit changes or deletes the user."""
+
+    def __init__(self, ttl: float = AUTH_CACHE_TTL, max_entries: int = AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, username: str, user: User):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[username] = (time.monotonic(), user)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None):
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _queue_principal_invalidation(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        principal_cache.invalidate()
+        return
+    # Applied only once the change is committed; the old name is included
+    # in case the username itself was changed
+    names = session.info.setdefault("stale_principals", set())
+    names.add(target.username)
+    names.update(inspect(target).attrs.username.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_invalidation(session):
+    for username in session.info.pop("stale_principals", ()):
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidation(session):
+    session.info.pop("stale_principals", None)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+
+async def _load_user(username: str, db: AsyncSession) -> User:
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
 
-    user = db.query(User).filter(User.username == username).first()
+    user = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    db.expunge(user)
+    principal_cache.put(username, user)
     return user
 
 
+async def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> User:
+    payload = _decode_token(token)
+    username: str = payload["sub"]
+
+    if (AUTH_TRUST_TOKEN_ROLES and request.method in READ_ONLY_METHODS
+            and payload.get("uid") is not None and payload.get("role")):
+        # Transient, never added to a session; only id, username and role
+        # are set, so routes that return the user use get_current_user_record
+        return User(id=payload["uid"], username=username, role=payload["role"], is_active=True)
+
+    return await _load_user(username, db)
+
+
+async def get_current_user_record(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> User:
+    """The user's full row, whatever AUTH_TRUST_TOKEN_ROLES is set to."""
+    return await _load_user(_decode_token(token)["sub"], db)
+
+
 def require_role(allowed_roles: list):
     async def role_checker(current_user: User = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
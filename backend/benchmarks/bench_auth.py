@@ -0,0 +1,96 @@
+"""Cost of resolving the current user per request, with and without caching.
+
+Runs ``auth.get_current_user`` against a throwaway SQLite database the way
+a request would (fresh async session, decoded token) in three modes: a users
+lookup every time (the old behaviour), the principal cache, and trusted
+token claims for read-only requests.
+
+    python -m benchmarks.bench_auth --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_auth_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import event  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from database.db import AsyncSessionLocal, Base, SessionLocal, async_engine, engine  # noqa: E402
+from models.models import User  # noqa: E402
+from auth import auth  # noqa: E402
+
+
+def _setup() -> str:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x", role="analyst")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    token = auth.create_access_token(auth.token_claims(user))
+    db.close()
+    return token
+
+
+async def _measure(token: str, n_requests: int) -> dict:
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await auth.get_current_user(request, token, db)
+        latencies.append(time.perf_counter() - start)
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    latencies.sort()
+    return {
+        "mean_us": round(statistics.mean(latencies) * 1e6, 1),
+        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99) - 1] * 1e6, 1),
+        "queries_per_request": round(queries / n_requests, 2),
+    }
+
+
+async def bench(n_requests: int) -> dict:
+    token = _setup()
+    results = {}
+    modes = (
+        ("db_lookup", 0, False),
+        ("principal_cache", 60, False),
+        ("trusted_claims", 60, True),
+    )
+    for name, ttl, trust in modes:
+        auth.principal_cache.ttl = ttl
+        auth.principal_cache.invalidate()
+        auth.AUTH_TRUST_TOKEN_ROLES = trust
+        await _measure(token, min(200, n_requests))  # warm-up
+        results[name] = await _measure(token, n_requests)
+
+    base = results["db_lookup"]["mean_us"]
+    for name in ("principal_cache", "trusted_claims"):
+        results[name]["saved_per_request_us"] = round(base - results[name]["mean_us"], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    for name, value in asyncio.run(bench(args.requests)).items():
+        print(f"{name:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
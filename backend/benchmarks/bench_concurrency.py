@@ -0,0 +1,127 @@
+"""Throughput of fast requests while slow analytics scans run alongside them.
+
+Copies the bundled SQLite database, grows its dataset to ``--rows`` by
+duplicating rows, and starts the API under uvicorn. For ``--duration``
+seconds it keeps ``--slow`` clients on full-dataset analytics scans and
+``--fast`` clients on cheap lookups, then reports each class separately.
+With ``--baseline REF`` the same load also runs against that git revision,
+checked out into a temporary worktree.
+
+    python -m benchmarks.bench_concurrency --rows 50000 --baseline HEAD~1
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+import httpx
+from benchmarks.bench_ollama_client import _free_port
+from benchmarks.bench_login_storm import BACKEND_DIR, _percentiles, start_api
+
+SLOW_PATHS = ["/api/analytics/skills", "/api/analytics/salary", "/api/analytics/department"]
+FAST_PATHS = ["/api/analytics/batch-years", "/api/data/datasets", "/api/auth/me"]
+SOURCE_DB = os.path.join(BACKEND_DIR, "placement_analytics.db")
+
+
+def prepare_db(rows: int) -> str:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_concurrency_"), "bench.db")
+    shutil.copy(SOURCE_DB, path)
+    conn = sqlite3.connect(path)
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(placement_data)") if r[1] != "id"]
+    dataset_id = conn.execute("SELECT MAX(dataset_id) FROM placement_data").fetchone()[0]
+    names = ", ".join(columns)
+    while conn.execute(
+        "SELECT COUNT(*) FROM placement_data WHERE dataset_id = ?", (dataset_id,)
+    ).fetchone()[0] < rows:
+        conn.execute(
+            f"INSERT INTO placement_data ({names}) SELECT {names} FROM placement_data "
+            "WHERE dataset_id = ? LIMIT ?",
+            (dataset_id, rows),
+        )
+        conn.commit()
+    conn.execute(
+        "DELETE FROM placement_data WHERE dataset_id = ? AND id NOT IN "
+        "(SELECT id FROM placement_data WHERE dataset_id = ? ORDER BY id LIMIT ?)",
+        (dataset_id, dataset_id, rows),
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+async def load(base_url: str, n_slow: int, n_fast: int, duration: float) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0) as client:
+        await client.post("/api/auth/register", json={
+            "username": "bench", "email": "bench@example.com", "password": "bench-password",
+        })
+        token = (await client.post(
+            "/api/auth/login", data={"username": "bench", "password": "bench-password"}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        latencies = {"slow": [], "fast": []}
+        deadline = time.perf_counter() + duration
+
+        async def worker(kind: str, paths: list, offset: int):
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                r = await client.get(paths[i % len(paths)], headers=headers)
+                r.raise_for_status()
+                latencies[kind].append(time.perf_counter() - start)
+                i += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker("slow", SLOW_PATHS, i) for i in range(n_slow)),
+            *(worker("fast", FAST_PATHS, i) for i in range(n_fast)),
+        )
+        elapsed = time.perf_counter() - start
+
+    return {
+        kind: {"requests": len(values), "rps": round(len(values) / elapsed, 1), **_percentiles(values)}
+        for kind, values in latencies.items()
+    }
+
+
+def run(name: str, db_path: str, args, cwd: str = BACKEND_DIR):
+    port = _free_port()
+    api = start_api(port, {}, db_path=db_path, cwd=cwd)
+    try:
+        results = asyncio.run(load(f"http://127.0.0.1:{port}", args.slow, args.fast, args.duration))
+    finally:
+        api.terminate()
+        api.wait()
+    print(f"{name}:")
+    for kind, value in results.items():
+        print(f"  {kind:>5}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--slow", type=int, default=4, help="clients running analytics scans")
+    parser.add_argument("--fast", type=int, default=8, help="clients running cheap lookups")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--baseline", help="git revision to compare against")
+    args = parser.parse_args()
+
+    db_path = prepare_db(args.rows)
+    if args.baseline:
+        worktree = tempfile.mkdtemp(prefix="bench_baseline_")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, args.baseline],
+                       cwd=BACKEND_DIR, check=True, capture_output=True)
+        try:
+            baseline_db = db_path + ".baseline"
+            shutil.copy(db_path, baseline_db)
+            run(f"baseline ({args.baseline})", baseline_db, args, cwd=os.path.join(worktree, "backend"))
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree],
+                           cwd=BACKEND_DIR, check=True, capture_output=True)
+    run("current", db_path, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""End-to-end throughput, latency and memory of the API on a synthetic dataset.
+
+Generates a ``--rows`` row CSV with benchmarks.synth (or uses ``--csv``),
+starts the Ollama stub and the API on a fresh SQLite database, and then
+drives each scenario in turn: the upload, /train, every analytics
+endpoint, the predict endpoints and chat. Repeated scenarios send
+``--requests`` requests at ``--concurrency``. Each scenario reports
+throughput, latency percentiles and the API's peak RSS while it ran.
+
+``--save NAME`` stores the results in ``--baselines``. ``--compare NAME``
+checks the run against a stored baseline and exits non-zero when a
+scenario regressed by more than ``--tolerance``.
+
+    python -m benchmarks.bench_e2e --rows 100000 --save main
+    python -m benchmarks.bench_e2e --rows 100000 --compare main
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.bench_ollama_client import _free_port, start_stub
+from benchmarks.bench_login_storm import start_api
+from benchmarks import synth
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+ANALYTICS_PATHS = [
+    "/api/analytics/overview", "/api/analytics/department", "/api/analytics/salary",
+    "/api/analytics/companies", "/api/analytics/skills", "/api/analytics/batch-years",
+    "/api/analytics/departments",
+]
+PROFILE = {
+    "cgpa": 7.8, "backlogs": 0, "internships": 1, "projects": 2, "certification_count": 1,
+    "aptitude_score": 65, "communication_score": 66, "department": "CSE",
+}
+
+
+def _percentiles(values: list) -> dict:
+    # p95 on top of bench_login_storm's set; regressions show up there first
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def at(q):
+        return round(values[max(int(len(values) * q) - 1, 0)] * 1000, 1)
+
+    return {
+        "p50_ms": round(values[len(values) // 2] * 1000, 1),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": round(values[-1] * 1000, 1),
+    }
+
+
+def reset_peak_rss(pid: int):
+    # Writing 5 to clear_refs resets VmHWM (Linux only)
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def _repeat(client, method: str, paths: list, n_requests: int, concurrency: int, body=None) -> dict:
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            r = await client.request(method, paths[i % len(paths)], json=body(i) if body else None)
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": n_requests, "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1), **_percentiles(latencies),
+    }
+
+
+async def _wait_for_phase(client, phase: str, timeout: float = 3600):
+    marker = f'phase_duration_seconds_count{{phase="{phase}"}}'
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if marker in (await client.get("/api/metrics")).text:
+            return
+        await asyncio.sleep(0.2)
+
+
+async def run_scenarios(base_url: str, api_pid: int, csv_path: str, rows: int,
+                        n_requests: int, concurrency: int) -> dict:
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=3600.0) as client:
+        await client.post("/api/auth/register", json={
+            "username": "bench", "email": "bench@example.com", "password": "bench-password",
+        })
+        token = (await client.post(
+            "/api/auth/login", data={"username": "bench", "password": "bench-password"}
+        )).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        async def once(name: str, method: str, path: str, **kwargs):
+            reset_peak_rss(api_pid)
+            start = time.perf_counter()
+            r = await client.request(method, path, **kwargs)
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                "status": r.status_code, "seconds": round(elapsed, 2),
+                "rows_per_s": round(rows / elapsed), "peak_rss_mb": peak_rss_mb(api_pid),
+            }
+            return r
+
+        with open(csv_path, "rb") as f:
+            r = await once("upload", "POST", "/api/data/upload",
+                           files={"file": (os.path.basename(csv_path), f, "text/csv")})
+        dataset_id = r.json()["dataset_id"]
+        await once("train", "POST", f"/api/ml/train?dataset_id={dataset_id}")
+        # A full train schedules scoring after the response; let it finish
+        # so it does not overlap with the scenarios below
+        start = time.perf_counter()
+        await _wait_for_phase(client, "scoring")
+        results["train"]["scoring_seconds"] = round(time.perf_counter() - start, 2)
+
+        scenarios = [
+            (path.rsplit("/", 1)[-1], "GET", [f"{path}?dataset_id={dataset_id}"], None)
+            for path in ANALYTICS_PATHS
+        ] + [
+            ("predict_placement", "POST", ["/api/ml/predict/placement"], lambda i: PROFILE),
+            ("predict_salary", "POST", ["/api/ml/predict/salary"], lambda i: PROFILE),
+            # Distinct questions so every chat reaches the stub instead of the cache
+            ("chat", "POST", ["/api/llm/chat"],
+             lambda i: {"message": f"How many students were placed? ({i})", "dataset_id": dataset_id}),
+        ]
+        for name, method, paths, body in scenarios:
+            await _repeat(client, method, paths, min(concurrency, n_requests), concurrency, body)  # warm-up
+            reset_peak_rss(api_pid)
+            results[name] = await _repeat(client, method, paths, n_requests, concurrency, body)
+            results[name]["peak_rss_mb"] = peak_rss_mb(api_pid)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        checks = [
+            ("seconds", 1), ("p50_ms", 1), ("p95_ms", 1), ("peak_rss_mb", 1),
+            ("rps", -1), ("rows_per_s", -1),
+        ]
+        for key, direction in checks:
+            if current.get(key) is None or not base.get(key):
+                continue
+            change = (current[key] - base[key]) / base[key]
+            if change * direction > tolerance:
+                regressions.append(f"{name}.{key}: {base[key]} -> {current[key]} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--csv", help="use this CSV instead of generating one")
+    parser.add_argument("--departments", default="CSE,ECE,IT,ME,EEE")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--save", metavar="NAME", help="store the results as this baseline")
+    parser.add_argument("--compare", metavar="NAME", help="compare against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    csv_path = args.csv
+    if csv_path is None:
+        csv_path = os.path.join(workdir, f"synthetic_{args.rows}.csv")
+        synth.write_csv(csv_path, args.rows, departments=args.departments.split(","))
+    rows = sum(1 for _ in open(csv_path)) - 1
+
+    stub_port, api_port = _free_port(), _free_port()
+    stub = start_stub(stub_port, tokens=20, token_delay=0, first_token_delay=0)
+    api = start_api(api_port, {
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{stub_port}",
+        "ML_ARTIFACT_DIR": os.path.join(workdir, "artifacts"),
+    }, db_path=os.path.join(workdir, "bench.db"))
+    try:
+        results = asyncio.run(run_scenarios(
+            f"http://127.0.0.1:{api_port}", api.pid, csv_path, rows, args.requests, args.concurrency,
+        ))
+    finally:
+        for proc in (api, stub):
+            proc.terminate()
+            proc.wait()
+
+    print(f"rows: {rows}")
+    for name, value in results.items():
+        print(f"  {name:>17}: {value}")
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+    if args.compare:
+        baseline = baselines.get(args.compare)
+        if baseline is None:
+            sys.exit(f"no baseline named {args.compare!r} in {args.baselines}")
+        if baseline["rows"] != rows:
+            print(f"warning: baseline {args.compare!r} was recorded with {baseline['rows']} rows")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        print(f"regressions against {args.compare!r}: {len(regressions)}")
+        for line in regressions:
+            print(f"  {line}")
+    if args.save:
+        baselines[args.save] = {
+            "rows": rows, "requests": args.requests, "concurrency": args.concurrency,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results,
+        }
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"saved baseline {args.save!r} to {args.baselines}")
+    if args.compare and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Login throughput, and latency of other endpoints, during a burst of logins.
+
+Starts the API under uvicorn on a throwaway SQLite database, once with
+bcrypt inline on the event loop (PASSWORD_HASH_WORKERS=0, the old
+behaviour) and once with the dedicated hashing pool. Each run fires
+``--logins`` concurrent logins while probing /api/health and /api/auth/me.
+
+    python -m benchmarks.bench_login_storm --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.bench_ollama_client import _free_port
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+N_USERS = 20
+PASSWORD = "storm-password"
+
+
+def start_api(port: int, env: dict, db_path: str = None, cwd: str = BACKEND_DIR) -> subprocess.Popen:
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bench_api_"), "bench.db")
+    # Keep model artifacts and the LLM cache out of the backend checkout
+    tmp_dir = os.path.dirname(os.path.abspath(db_path))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+        env={
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "DB_CREATE_ALL": "1",
+            "ML_ARTIFACT_DIR": os.path.join(tmp_dir, "ml_artifacts"),
+            "LLM_CACHE_PATH": os.path.join(tmp_dir, "llm_cache.db"),
+            **env,
+        },
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=0.5)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("API did not start")
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        "p50_ms": round(values[len(values) // 2] * 1000, 1),
+        "p99_ms": round(values[max(int(len(values) * 0.99) - 1, 0)] * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1),
+    }
+
+
+async def storm(base_url: str, n_logins: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        for i in range(N_USERS):
+            await client.post("/api/auth/register", json={
+                "username": f"storm{i}", "email": f"storm{i}@example.com", "password": PASSWORD,
+            })
+        token = (await client.post(
+            "/api/auth/login", data={"username": "storm0", "password": PASSWORD}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        probes = {"/api/health": [], "/api/auth/me": []}
+        logins, rejected = [], 0
+        running = True
+
+        async def probe():
+            while running:
+                for path, latencies in probes.items():
+                    start = time.perf_counter()
+                    await client.get(path, headers=headers)
+                    latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.02)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login(i: int):
+            nonlocal rejected
+            async with semaphore:
+                start = time.perf_counter()
+                r = await client.post("/api/auth/login", data={
+                    "username": f"storm{i % N_USERS}", "password": PASSWORD,
+                })
+                if r.status_code == 503:
+                    rejected += 1
+                else:
+                    logins.append(time.perf_counter() - start)
+
+        prober = asyncio.ensure_future(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(n_logins)))
+        elapsed = time.perf_counter() - start
+        running = False
+        await prober
+
+    return {
+        "logins_per_s": round(len(logins) / elapsed, 1),
+        "rejected": rejected,
+        "login": _percentiles(logins),
+        **{path: _percentiles(latencies) for path, latencies in probes.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS for the run")
+    args = parser.parse_args()
+
+    modes = (("inline", {"PASSWORD_HASH_WORKERS": "0"}), ("hash_pool", {}))
+    for name, env in modes:
+        port = _free_port()
+        api = start_api(port, {"BCRYPT_ROUNDS": str(args.rounds), **env})
+        try:
+            results = asyncio.run(storm(f"http://127.0.0.1:{port}", args.logins, args.concurrency))
+        finally:
+            api.terminate()
+            api.wait()
+        print(f"{name}:")
+        for key, value in results.items():
+            print(f"  {key:>14}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Per-request overhead of a fresh httpx client versus the shared pool.
+
+Starts the Ollama stub on a free port with zero generation latency, then
+times the same calls made through a new AsyncClient per request (the old
+behaviour of routes/llm.py) and through services.ollama's pooled client.
+
+    python -m benchmarks.bench_ollama_client --requests 500 --concurrency 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub(port: int, **options) -> subprocess.Popen:
+    args = [sys.executable, "-m", "benchmarks.stub_ollama", "--port", str(port)]
+    for name, value in options.items():
+        args += [f"--{name.replace('_', '-')}", str(value)]
+    proc = subprocess.Popen(args, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/tags", timeout=0.5)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Ollama stub did not start")
+
+
+PAYLOAD = {"model": "llama3", "prompt": "hi", "stream": False}
+
+
+async def _run(call, n_requests: int, concurrency: int) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    return latencies
+
+
+async def bench(base_url: str, n_requests: int, concurrency: int) -> dict:
+    async def fresh_client():
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            await client.post(f"{base_url}/api/generate", json=PAYLOAD)
+
+    from services import ollama
+    ollama.OLLAMA_BASE_URL = base_url
+    await ollama.startup()
+
+    async def pooled_client():
+        await ollama.get_ollama_client().post("/api/generate", json=PAYLOAD)
+
+    results = {}
+    for name, call in (("per_request_client", fresh_client), ("pooled_client", pooled_client)):
+        await _run(call, min(20, n_requests), concurrency)  # warm-up
+        start = time.perf_counter()
+        latencies = await _run(call, n_requests, concurrency)
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        results[name] = {
+            "throughput_rps": round(n_requests / elapsed, 1),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+        }
+    await ollama.shutdown()
+
+    results["saved_per_request_ms"] = round(
+        results["per_request_client"]["mean_ms"] - results["pooled_client"]["mean_ms"], 3
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    port = _free_port()
+    stub = start_stub(port, tokens=5, token_delay=0, first_token_delay=0)
+    try:
+        results = asyncio.run(bench(f"http://127.0.0.1:{port}", args.requests, args.concurrency))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    for name, value in results.items():
+        print(f"{name:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Serialization time and bytes on the wire for the main read endpoints.
+
+Grows a copy of the bundled SQLite database to ``--rows`` rows, then for
+each endpoint compares the old encoding path (stdlib json after
+jsonable_encoder and, for /records, ORM instances) with the current one
+(orjson and, for /records, the PlacementRecord columns as plain rows).
+The /records timings include fetching the page.
+Response sizes are measured through the app with no compression and with
+each coding the compression middleware can negotiate.
+
+    python -m benchmarks.bench_serialization --rows 50000 --limit 1000
+"""
+import argparse
+import os
+import time
+from benchmarks.bench_concurrency import prepare_db
+
+ENDPOINTS = [
+    "/api/analytics/overview", "/api/analytics/department", "/api/analytics/salary",
+    "/api/analytics/companies", "/api/analytics/skills", "/api/data/datasets",
+]
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--limit", type=int, default=1000, help="page size for /records")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{prepare_db(args.rows)}"
+    os.environ["DB_CREATE_ALL"] = "1"
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+    from database.db import SessionLocal
+    from models.models import PlacementData
+    from routes.data import RECORD_COLUMNS
+    from utils.compression import brotli
+    import main as app_module
+
+    db = SessionLocal()
+    dataset_id = db.execute(select(func.max(PlacementData.dataset_id))).scalar()
+    records_query = (
+        select(PlacementData).where(PlacementData.dataset_id == dataset_id)
+        .order_by(PlacementData.id).limit(args.limit)
+    )
+
+    def records_before():
+        rows = db.execute(records_query).scalars().all()
+        return JSONResponse(jsonable_encoder(rows)).body
+
+    def records_after():
+        rows = db.execute(records_query.with_only_columns(*RECORD_COLUMNS)).mappings().all()
+        return ORJSONResponse([dict(r) for r in rows]).body
+
+    with TestClient(app_module.app) as client:
+        client.post("/api/auth/register", json={
+            "username": "bench", "email": "bench@example.com", "password": "bench-password",
+        })
+        token = client.post(
+            "/api/auth/login", data={"username": "bench", "password": "bench-password"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        timings = {
+            f"/api/data/records?limit={args.limit}": (
+                _best_of(records_before, args.repeat), _best_of(records_after, args.repeat),
+            ),
+        }
+        for path in ENDPOINTS:
+            payload = client.get(path, headers=headers).json()
+            timings[path] = (
+                _best_of(lambda: JSONResponse(jsonable_encoder(payload)).body, args.repeat),
+                _best_of(lambda: ORJSONResponse(jsonable_encoder(payload)).body, args.repeat),
+            )
+
+        encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+        print(f"rows: {args.rows}  (times are best of {args.repeat}; brotli "
+              f"{'available' if brotli is not None else 'not installed'})")
+        for path, (before, after) in timings.items():
+            url = f"/api/data/records/{dataset_id}?limit={args.limit}" if path.startswith("/api/data/records") else path
+            sizes = {}
+            for encoding in encodings:
+                r = client.get(url, headers={**headers, "Accept-Encoding": encoding})
+                sizes[encoding] = int(r.headers["content-length"])
+            print(f"{path}")
+            print(f"  serialize_ms: {before} -> {after} ({before / max(after, 0.01):.1f}x)")
+            print(f"  bytes: {sizes}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
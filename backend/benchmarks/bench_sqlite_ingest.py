@@ -0,0 +1,124 @@
+"""Dashboard read latency while a large CSV upload is being written.
+
+Starts the API on a copy of the bundled SQLite database, once with the
+default SQLite settings and once with SQLITE_PROFILE=production. Readers
+poll dashboard endpoints throughout; after a quiet warm-up period one
+client uploads a ``--rows`` row CSV. Reader latency is reported for the
+quiet period and for the time the upload was in flight.
+
+    python -m benchmarks.bench_sqlite_ingest --rows 100000 --readers 4
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import httpx
+from benchmarks.bench_ollama_client import _free_port
+from benchmarks.bench_login_storm import _percentiles, start_api
+from benchmarks.bench_concurrency import SOURCE_DB
+
+# Pinned to the bundled dataset so the read workload does not change when
+# the uploaded dataset becomes the latest one
+READ_PATHS = [
+    "/api/analytics/overview?dataset_id=1",
+    "/api/analytics/department?dataset_id=1",
+    "/api/data/datasets",
+]
+CSV_COLUMNS = [
+    "student_name", "gender", "age", "department", "batch_year", "cgpa", "backlogs",
+    "internships", "projects", "skills", "certification_count", "aptitude_score",
+    "communication_score", "placed", "company_name", "salary", "placement_type",
+]
+
+
+def build_csv(rows: int) -> bytes:
+    conn = sqlite3.connect(SOURCE_DB)
+    source = conn.execute(f"SELECT {', '.join(CSV_COLUMNS)} FROM placement_data").fetchall()
+    conn.close()
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for i in range(rows):
+        # Vary the name so drop_duplicates keeps every row
+        row = list(source[i % len(source)])
+        row[0] = f"{row[0]} {i}"
+        writer.writerow(row)
+    return out.getvalue().encode()
+
+
+async def measure(base_url: str, payload: bytes, n_readers: int, quiet: float) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=600.0) as client:
+        await client.post("/api/auth/register", json={
+            "username": "bench", "email": "bench@example.com", "password": "bench-password",
+        })
+        token = (await client.post(
+            "/api/auth/login", data={"username": "bench", "password": "bench-password"}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        phases = {"quiet": [], "during_upload": []}
+        errors = {"quiet": 0, "during_upload": 0}
+        state = {"phase": "quiet", "running": True}
+
+        async def reader(offset: int):
+            i = offset
+            while state["running"]:
+                phase = state["phase"]
+                start = time.perf_counter()
+                r = await client.get(READ_PATHS[i % len(READ_PATHS)], headers=headers)
+                if r.status_code == 200:
+                    phases[phase].append(time.perf_counter() - start)
+                else:
+                    errors[phase] += 1
+                i += 1
+
+        readers = [asyncio.ensure_future(reader(i)) for i in range(n_readers)]
+        await asyncio.sleep(quiet)
+        state["phase"] = "during_upload"
+        start = time.perf_counter()
+        r = await client.post(
+            "/api/data/upload", headers=headers,
+            files={"file": ("bench_ingest.csv", payload, "text/csv")},
+        )
+        upload_s = time.perf_counter() - start
+        state["running"] = False
+        await asyncio.gather(*readers)
+
+    return {
+        "upload": {"status": r.status_code, "seconds": round(upload_s, 2)},
+        **{
+            phase: {"requests": len(values), "errors": errors[phase], **_percentiles(values)}
+            for phase, values in phases.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--quiet", type=float, default=5, help="seconds of reads before the upload")
+    args = parser.parse_args()
+
+    payload = build_csv(args.rows)
+    for profile in ("default", "production"):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bench_ingest_"), "bench.db")
+        shutil.copy(SOURCE_DB, db_path)
+        port = _free_port()
+        api = start_api(port, {"SQLITE_PROFILE": profile}, db_path=db_path)
+        try:
+            results = asyncio.run(measure(f"http://127.0.0.1:{port}", payload, args.readers, args.quiet))
+        finally:
+            api.terminate()
+            api.wait()
+        print(f"{profile}:")
+        for key, value in results.items():
+            print(f"  {key:>13}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Worker cold start: import time, time until /api/health answers, first ML call.
+
+Each run is a fresh interpreter. Import time is measured for ``import
+main``; readiness is the time from spawning uvicorn until /api/health
+returns 200. The first /api/ml/model-info call shows where the deferred
+ML imports are paid, with and without ML_WARMUP. With ``--baseline REF``
+the same runs are repeated against that git revision in a temporary
+worktree.
+
+    python -m benchmarks.bench_startup --runs 5 --baseline HEAD~1
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.bench_ollama_client import _free_port
+from benchmarks.bench_login_storm import BACKEND_DIR
+from benchmarks.bench_concurrency import SOURCE_DB
+
+IMPORT_SNIPPET = (
+    "import sys, time; start = time.perf_counter(); import main; "
+    "elapsed = time.perf_counter() - start; "
+    "heavy = [m for m in ('pandas', 'sklearn', 'scipy', 'numpy') if m in sys.modules]; "
+    "print(elapsed, ','.join(heavy))"
+)
+
+
+def time_import(cwd: str, env: dict) -> tuple:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=cwd, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), out[1] if len(out) > 1 else ""
+
+
+def time_ready(cwd: str, env: dict) -> tuple:
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        # Poll with bare connects: building an httpx client per attempt
+        # costs enough CPU to slow down the worker being measured
+        while True:
+            if time.perf_counter() - start > 60:
+                raise RuntimeError("API did not start")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.01)
+        httpx.get(f"{base}/api/health", timeout=10).raise_for_status()
+        ready = time.perf_counter() - start
+
+        with httpx.Client(base_url=base, timeout=60) as client:
+            client.post("/api/auth/register", json={
+                "username": "bench", "email": "bench@example.com", "password": "bench-password",
+            })
+            token = client.post(
+                "/api/auth/login", data={"username": "bench", "password": "bench-password"}
+            ).json()["access_token"]
+            ml_start = time.perf_counter()
+            client.get("/api/ml/model-info", headers={"Authorization": f"Bearer {token}"}).raise_for_status()
+            first_ml = time.perf_counter() - ml_start
+        return ready, first_ml
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def bench(name: str, cwd: str, db_path: str, runs: int):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}",
+           "ML_ARTIFACT_DIR": tempfile.mkdtemp(prefix="bench_startup_")}
+    imports = [time_import(cwd, env) for _ in range(runs)]
+    print(f"{name}:")
+    print(f"  import main: median {statistics.median(t for t, _ in imports) * 1000:.0f}ms, "
+          f"min {min(t for t, _ in imports) * 1000:.0f}ms; heavy modules loaded: {imports[0][1] or 'none'}")
+    for label, extra in (("default", {}), ("ML_WARMUP=1", {"ML_WARMUP": "1"})):
+        results = [time_ready(cwd, {**env, **extra}) for _ in range(runs)]
+        print(f"  {label:>11}: ready median {statistics.median(r for r, _ in results) * 1000:.0f}ms, "
+              f"first /api/ml/model-info median {statistics.median(m for _, m in results) * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", help="git revision to compare against")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_startup_"), "bench.db")
+    shutil.copy(SOURCE_DB, db_path)
+    subprocess.run([sys.executable, "migrate.py"], cwd=BACKEND_DIR, check=True, capture_output=True,
+                   env={**os.environ, "DATABASE_URL": f"sqlite:///{db_path}"})
+
+    if args.baseline:
+        worktree = tempfile.mkdtemp(prefix="bench_baseline_")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, args.baseline],
+                       cwd=BACKEND_DIR, check=True, capture_output=True)
+        try:
+            bench(f"baseline ({args.baseline})", os.path.join(worktree, "backend"), db_path, args.runs)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree],
+                           cwd=BACKEND_DIR, check=True, capture_output=True)
+    bench("current", BACKEND_DIR, db_path, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Minimal stand-in for the Ollama HTTP API used by the LLM routes.
+
+Serves /api/generate (streaming NDJSON or a single JSON body) and /api/tags
+with configurable token latency, and counts generations that were completed
+or abandoned by the client at /stub/stats.
+
+    python -m benchmarks.stub_ollama --port 11434 --tokens 50 --token-delay 0.02
+"""
+import argparse
+import asyncio
+import json
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Ollama stub")
+app.state.tokens = 50
+app.state.token_delay = 0.02
+app.state.first_token_delay = 0.05
+app.state.stats = {"started": 0, "completed": 0, "cancelled": 0}
+
+
+def _tokens(prompt: str):
+    words = (prompt.split() or ["ok"]) * app.state.tokens
+    return [w + " " for w in words[: app.state.tokens]]
+
+
+async def _generate_stream(body: dict):
+    stats = app.state.stats
+    stats["started"] += 1
+    try:
+        await asyncio.sleep(app.state.first_token_delay)
+        for token in _tokens(body.get("prompt", "")):
+            yield json.dumps({"model": body.get("model"), "response": token, "done": False}) + "\n"
+            await asyncio.sleep(app.state.token_delay)
+        yield json.dumps({"model": body.get("model"), "response": "", "done": True}) + "\n"
+        stats["completed"] += 1
+    except asyncio.CancelledError:
+        stats["cancelled"] += 1
+        raise
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    body = await request.json()
+    if body.get("stream", True):
+        return StreamingResponse(_generate_stream(body), media_type="application/x-ndjson")
+
+    app.state.stats["started"] += 1
+    tokens = _tokens(body.get("prompt", ""))
+    await asyncio.sleep(app.state.first_token_delay + app.state.token_delay * len(tokens))
+    app.state.stats["completed"] += 1
+    return {
+        "model": body.get("model"),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "response": "".join(tokens),
+        "done": True,
+    }
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": "llama3:latest"}, {"name": "mistral:latest"}]}
+
+
+@app.get("/stub/stats")
+async def stats():
+    return app.state.stats
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    app.state.tokens = args.tokens
+    app.state.token_delay = args.token_delay
+    app.state.first_token_delay = args.first_token_delay
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Synthetic placement CSVs shaped like the bundled MUJ dataset, at any size.
+
+Fits simple per-column distributions to the source CSV: category
+frequencies, clipped normals for scores, placement rate by CGPA decile,
+companies and roles among placed students, a log-normal salary per role
+and skill frequencies per role. It then writes ``--rows`` rows in chunks,
+so 10M-row files never need to fit in memory.
+
+    python -m benchmarks.synth --rows 1000000 --out /tmp/placements_1m.csv
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.bench_login_storm import BACKEND_DIR
+
+SOURCE_CSV = os.path.join(os.path.dirname(BACKEND_DIR), "MUJ_CSV_DATASET_5-YRS.csv")
+CHUNK_ROWS = 200000
+# Distinct skill lists drawn per role; rows pick from this pool
+SKILL_POOL_SIZE = 2000
+NORMAL_COLUMNS = ["cgpa", "aptitude_score", "communication_score"]
+COUNT_COLUMNS = ["backlogs", "internships", "projects", "certifications"]
+OUTPUT_COLUMNS = [
+    "student_id", "student_name", "gender", "department", "graduation_year", "cgpa",
+    "backlogs", "internships", "projects", "certifications", "aptitude_score",
+    "communication_score", "placed", "company", "role", "salary", "salary_bucket", "skills",
+]
+
+
+def _frequencies(series: pd.Series) -> tuple:
+    counts = series.value_counts(normalize=True)
+    return counts.index.to_numpy(), counts.to_numpy()
+
+
+def fit(path: str = SOURCE_CSV) -> dict:
+    df = pd.read_csv(path)
+    df = df.loc[:, ~df.columns.duplicated()]
+    names = df["student_name"].str.split(" ", n=1, expand=True)
+    placed = df[df["placed"]]
+
+    cgpa_edges = np.unique(np.quantile(df["cgpa"], np.linspace(0, 1, 11)))
+    cgpa_bin = np.clip(np.searchsorted(cgpa_edges, df["cgpa"], side="right") - 1, 0, len(cgpa_edges) - 2)
+
+    roles = {}
+    for role, group in placed.groupby("role"):
+        skills = group["skills"].fillna("").str.split(", ")
+        log_salary = np.log(group["salary"].clip(lower=0.1))
+        roles[role] = {
+            "salary": (log_salary.mean(), log_salary.std(ddof=0)),
+            "skills": _frequencies(skills.explode()),
+            "skill_count": _frequencies(skills.str.len()),
+        }
+
+    return {
+        "first_names": names[0].unique(),
+        "last_names": names[1].dropna().unique(),
+        "gender": _frequencies(df["gender"]),
+        "department": _frequencies(df["department"]),
+        "graduation_year": _frequencies(df["graduation_year"]),
+        "normal": {
+            col: (df[col].mean(), df[col].std(ddof=0), df[col].min(), df[col].max())
+            for col in NORMAL_COLUMNS
+        },
+        "counts": {col: _frequencies(df[col]) for col in COUNT_COLUMNS},
+        "cgpa_edges": cgpa_edges,
+        "placement_rate": df.groupby(cgpa_bin)["placed"].mean().to_numpy(),
+        "company": _frequencies(placed["company"]),
+        "role": _frequencies(placed["role"]),
+        "roles": roles,
+        "salary_max": placed["salary"].max(),
+    }
+
+
+def _skill_pool(rng: np.random.Generator, role_model: dict) -> np.ndarray:
+    skills, weights = role_model["skills"]
+    lengths, length_weights = role_model["skill_count"]
+    pool = []
+    for length in rng.choice(lengths, size=SKILL_POOL_SIZE, p=length_weights):
+        length = min(int(length), len(skills))
+        pool.append(", ".join(rng.choice(skills, size=length, replace=False, p=weights)))
+    return np.array(pool, dtype=object)
+
+
+def _salary_bucket(salary: np.ndarray) -> np.ndarray:
+    return np.select(
+        [salary <= 0, salary < 6, salary < 10, salary < 20],
+        ["0", "3-6", "6-10", "10-20"],
+        default="20+",
+    )
+
+
+def generate(model: dict, n_rows: int, rng: np.random.Generator, start_id: int = 20001,
+             departments: list = None, skill_pools: dict = None) -> pd.DataFrame:
+    def pick(key):
+        values, weights = model[key]
+        return rng.choice(values, size=n_rows, p=weights)
+
+    data = {
+        "student_id": np.arange(start_id, start_id + n_rows),
+        "student_name": (
+            rng.choice(model["first_names"], size=n_rows).astype(object) + " "
+            + rng.choice(model["last_names"], size=n_rows).astype(object)
+        ),
+        "gender": pick("gender"),
+        "department": rng.choice(departments, size=n_rows) if departments else pick("department"),
+        "graduation_year": pick("graduation_year"),
+    }
+    for col, (mean, std, low, high) in model["normal"].items():
+        values = np.clip(rng.normal(mean, std, size=n_rows), low, high)
+        data[col] = values.round(2) if col == "cgpa" else values.round().astype(int)
+    for col, (values, weights) in model["counts"].items():
+        data[col] = rng.choice(values, size=n_rows, p=weights)
+
+    edges = model["cgpa_edges"]
+    cgpa_bin = np.clip(np.searchsorted(edges, data["cgpa"], side="right") - 1, 0, len(edges) - 2)
+    placed = rng.random(n_rows) < model["placement_rate"][cgpa_bin]
+    role = pick("role").astype(object)
+    salary = np.zeros(n_rows)
+    skills = np.empty(n_rows, dtype=object)
+    for name, role_model in model["roles"].items():
+        mask = role == name
+        mu, sigma = role_model["salary"]
+        salary[mask] = np.exp(rng.normal(mu, sigma, size=mask.sum())).round(2)
+        skills[mask] = rng.choice(skill_pools[name], size=mask.sum())
+    salary = np.minimum(salary, model["salary_max"])
+    salary[~placed] = 0
+
+    data.update({
+        "placed": np.where(placed, "TRUE", "FALSE"),
+        "company": np.where(placed, pick("company"), "Not Placed"),
+        "role": np.where(placed, role, ""),
+        "salary": salary,
+        "salary_bucket": _salary_bucket(salary),
+        "skills": skills,
+    })
+    return pd.DataFrame(data, columns=OUTPUT_COLUMNS)
+
+
+def write_csv(path: str, n_rows: int, seed: int = 42, source: str = SOURCE_CSV,
+              departments: list = None) -> str:
+    model = fit(source)
+    rng = np.random.default_rng(seed)
+    skill_pools = {name: _skill_pool(rng, role_model) for name, role_model in model["roles"].items()}
+    written = 0
+    while written < n_rows:
+        chunk = generate(model, min(CHUNK_ROWS, n_rows - written), rng, start_id=20001 + written,
+                         departments=departments, skill_pools=skill_pools)
+        chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += len(chunk)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--out", default="synthetic_placements.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--source", default=SOURCE_CSV, help="CSV to fit the distributions to")
+    parser.add_argument("--departments", help="comma separated; spreads rows evenly across them "
+                                               "(the bundled dataset is CSE only)")
+    args = parser.parse_args()
+
+    departments = args.departments.split(",") if args.departments else None
+    start = time.perf_counter()
+    write_csv(args.out, args.rows, seed=args.seed, source=args.source, departments=departments)
+    print(f"wrote {args.rows} rows to {args.out} in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(args.out) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
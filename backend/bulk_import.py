@@ -0,0 +1,192 @@
+"""Import every CSV under a directory, one dataset per file.
+
+Headers are read first, in parallel, and files are grouped by their
+normalized column set. Files that the upload route would reject are
+reported before anything is written. The remaining files are parsed in
+a process pool with the same normalization and column aliases as
+/api/data/upload, while this process writes each parsed file to the
+database as it arrives.
+
+    python bulk_import.py ./exports --match MUJ --workers 4
+    python bulk_import.py ./exports --dry-run
+"""
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from sqlalchemy import insert, select
+from database.db import SessionLocal
+from models.models import AuditLog, Dataset, DatasetProfile, PlacementData, User
+from services import ingest
+
+INSERT_BATCH_SIZE = 10000
+
+
+def discover(directory: str, pattern: str, match: str = None) -> list:
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if fnmatch.fnmatch(name.lower(), pattern.lower()) and (not match or match in name):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def read_header(path: str):
+    import pandas as pd
+    try:
+        return list(pd.read_csv(path, nrows=0).columns)
+    except Exception as e:
+        return e
+
+
+def group_by_schema(headers: dict) -> tuple:
+    """Files keyed by their sorted normalized columns, plus unreadable files."""
+    groups, unreadable = defaultdict(list), {}
+    for path, columns in headers.items():
+        if isinstance(columns, Exception):
+            unreadable[path] = columns
+        else:
+            groups[tuple(sorted(set(ingest.normalize_names(columns))))].append(path)
+    return dict(groups), unreadable
+
+
+def parse_file(path: str) -> tuple:
+    # Runs in a pool process; dataset ids are assigned by the writer
+    start = time.perf_counter()
+    df, profile = ingest.read_csv(path)
+    rows = ingest.placement_rows(df, None)
+    return rows, profile, time.perf_counter() - start
+
+
+def write_file(db, path: str, directory: str, rows: list, profile: dict, user_id) -> int:
+    name = os.path.basename(path)
+    # Versioned by file name, like uploads
+    latest = db.execute(
+        select(Dataset.version).where(Dataset.name == name)
+        .order_by(Dataset.version.desc()).limit(1)
+    ).scalar()
+    dataset = Dataset(
+        name=name,
+        version=(latest or 0) + 1,
+        uploaded_by=user_id,
+        record_count=len(rows),
+        description=f"Bulk import of {os.path.relpath(path, directory)}",
+    )
+    db.add(dataset)
+    db.flush()
+    for row in rows:
+        row["dataset_id"] = dataset.id
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.execute(insert(PlacementData), rows[start:start + INSERT_BATCH_SIZE])
+    db.add(DatasetProfile(
+        dataset_id=dataset.id,
+        summary=json.dumps(profile["summary"]),
+        sketches=json.dumps(profile["sketches"]),
+    ))
+    db.add(AuditLog(
+        user_id=user_id, action="bulk_import",
+        details=json.dumps({"dataset_id": dataset.id, "filename": name, "records": len(rows)}),
+    ))
+    db.commit()
+    return dataset.id
+
+
+def print_groups(groups: dict, unreadable: dict, directory: str, list_files: bool):
+    for i, (columns, paths) in enumerate(sorted(groups.items(), key=lambda g: -len(g[1])), 1):
+        missing = ingest.missing_required(columns)
+        aliases = ingest.resolve_aliases(columns)
+        status = f"skipped, missing {missing}" if missing else "ok"
+        print(f"schema {i}: {len(paths)} file(s), {status}")
+        print(f"  columns: {', '.join(columns)}")
+        if aliases:
+            print(f"  aliases: {', '.join(f'{a} -> {e}' for e, a in aliases.items())}")
+        if list_files or missing:
+            for path in paths:
+                print(f"    {os.path.relpath(path, directory)}")
+    for path, error in unreadable.items():
+        print(f"unreadable: {os.path.relpath(path, directory)}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--pattern", default="*.csv", help="file name glob (default *.csv)")
+    parser.add_argument("--match", help="only files whose name contains this")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parsing processes")
+    parser.add_argument("--user", help="username recorded as the uploader")
+    parser.add_argument("--dry-run", action="store_true", help="only report the schema groups")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = discover(args.directory, args.pattern, args.match)
+    if not paths:
+        print(f"No files matching {args.pattern} under {args.directory}")
+        return
+    with ThreadPoolExecutor(max_workers=min(32, len(paths))) as pool:
+        headers = dict(zip(paths, pool.map(read_header, paths)))
+    groups, unreadable = group_by_schema(headers)
+    print(f"{len(paths)} file(s) in {len(groups)} schema group(s), "
+          f"headers read in {time.perf_counter() - started:.2f}s")
+    print_groups(groups, unreadable, args.directory, args.dry_run)
+    if args.dry_run:
+        return
+
+    accepted = [p for columns, group in groups.items() if not ingest.missing_required(columns) for p in group]
+    db = SessionLocal()
+    user_id = None
+    if args.user:
+        user_id = db.execute(select(User.id).where(User.username == args.user)).scalar()
+        if user_id is None:
+            sys.exit(f"Unknown user {args.user}")
+
+    total_rows = total_bytes = 0
+    parse_seconds = write_seconds = 0.0
+    failed = []
+    import_started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {pool.submit(parse_file, path): path for path in accepted}
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                label = os.path.relpath(path, args.directory)
+                try:
+                    rows, profile, parse_time = future.result()
+                except Exception as e:
+                    failed.append(path)
+                    print(f"[{done}/{len(accepted)}] {label}: failed to parse, {e}")
+                    continue
+                start = time.perf_counter()
+                try:
+                    dataset_id = write_file(db, path, args.directory, rows, profile, user_id)
+                except Exception as e:
+                    db.rollback()
+                    failed.append(path)
+                    print(f"[{done}/{len(accepted)}] {label}: failed to write, {e}")
+                    continue
+                write_time = time.perf_counter() - start
+                parse_seconds += parse_time
+                write_seconds += write_time
+                total_rows += len(rows)
+                total_bytes += os.path.getsize(path)
+                print(f"[{done}/{len(accepted)}] {label}: dataset {dataset_id}, {len(rows)} rows, "
+                      f"parse {parse_time:.2f}s, write {write_time:.2f}s")
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - import_started
+    imported = len(accepted) - len(failed)
+    print(f"imported {imported} file(s), {total_rows} rows in {elapsed:.2f}s: "
+          f"{total_rows / max(elapsed, 1e-9):.0f} rows/s, {total_bytes / 2**20 / max(elapsed, 1e-9):.1f} MiB/s "
+          f"(parse {parse_seconds:.2f}s across {args.workers} worker(s), write {write_seconds:.2f}s)")
+    skipped = len(paths) - len(accepted)
+    if skipped or failed:
+        print(f"skipped {skipped} file(s), {len(failed)} failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
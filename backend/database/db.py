@@ -1,16 +1,99 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./placement_analytics.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-)
+# Async drivers for the request path; the sync engine stays for model
+# training, background jobs and scripts
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _async_url(url: str) -> str:
+    # Other backends or drivers need ASYNC_DATABASE_URL set explicitly
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+# Tables are created by migrate.py; set this to also create missing ones
+# when the app starts, e.g. for throwaway development databases
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "0") == "1"
+
+# "production" turns on WAL and the pragmas below, and splits SQLite access
+# into a small write pool and a larger read-only pool, so dashboards keep
+# reading while an upload is being written
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "1"))
+DB_WRITE_POOL_TIMEOUT = float(os.getenv("DB_WRITE_POOL_TIMEOUT", "120"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", "8"))
+SPLIT_ENGINES = IS_SQLITE and SQLITE_PROFILE == "production"
+
+
+def _sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+
+def _create_engines(read_only: bool) -> tuple:
+    if SPLIT_ENGINES:
+        pool = (
+            {"pool_size": DB_READ_POOL_SIZE, "max_overflow": DB_READ_MAX_OVERFLOW} if read_only
+            else {"pool_size": DB_WRITE_POOL_SIZE, "max_overflow": 0, "pool_timeout": DB_WRITE_POOL_TIMEOUT}
+        )
+    else:
+        pool = {}
+    sync_engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False} if IS_SQLITE else {},
+        **pool,
+    )
+    # aiosqlite defaults to NullPool, which would reopen (and re-tune) a
+    # connection for every session
+    async_pool = {"poolclass": AsyncAdaptedQueuePool, **pool} if SPLIT_ENGINES else pool
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_pool)
+    if SPLIT_ENGINES:
+        event.listen(sync_engine, "connect", _sqlite_pragmas(read_only))
+        event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas(read_only))
+    return sync_engine, async_engine
+
+
+engine, async_engine = _create_engines(read_only=False)
+if SPLIT_ENGINES:
+    read_engine, async_read_engine = _create_engines(read_only=True)
+else:
+    read_engine, async_read_engine = engine, async_engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 
@@ -20,3 +103,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines():
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
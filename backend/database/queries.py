@@ -0,0 +1,14 @@
+"""Queries shared by routes, services and scripts."""
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.models import Dataset
+
+
+def latest_dataset(*columns):
+    """Select ``columns`` (default: the id) of the most recent upload."""
+    return select(*(columns or (Dataset.id,))).order_by(Dataset.uploaded_at.desc()).limit(1)
+
+
+async def latest_dataset_id(db: AsyncSession) -> Optional[int]:
+    return (await db.execute(latest_dataset())).scalar_one_or_none()
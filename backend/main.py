@@ -1,13 +1,24 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from database.db import engine, Base
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from database.db import engine, dispose_engines, Base, DB_CREATE_ALL
 from routes import auth, data, analytics, ml, llm
+from services import ollama
+from services.audit import audit_log
+from ml import runtime as ml_runtime
+from auth.auth import password_hasher
+from utils import metrics
+from utils.compression import CompressionMiddleware
+from utils.profiler import profiler
 import models.models  # noqa: F401 - registers models
 
 app = FastAPI(
     title="Smart Placement Analytics API",
     description="Open-Source Placement Analytics Dashboard Backend",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -17,6 +28,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_sqlalchemy()
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(data.router, prefix="/api/data", tags=["Data Management"])
@@ -27,9 +41,31 @@ app.include_router(llm.router, prefix="/api/llm", tags=["LLM Integration"])
 
 @app.on_event("startup")
 async def startup():
-    Base.metadata.create_all(bind=engine)
+    if DB_CREATE_ALL:
+        # Schema changes normally go through migrate.py before deploying
+        Base.metadata.create_all(bind=engine)
+    await ollama.startup()
+    audit_log.start()
+    if metrics.METRICS_PROFILE_SLOW_MS > 0:
+        profiler.start()
+    if ml_runtime.ML_WARMUP:
+        app.state.warmup = asyncio.ensure_future(run_in_threadpool(ml_runtime.warm_up))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await ollama.shutdown()
+    password_hasher.shutdown()
+    await audit_log.stop()
+    await dispose_engines()
+    profiler.stop()
 
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,28 @@
+"""Create any missing tables in the configured database.
+
+Run once before starting the API, and again after pulling changes that
+add models. Existing tables are left as they are.
+
+    python migrate.py
+"""
+import argparse
+from sqlalchemy import inspect
+from database.db import DATABASE_URL, Base, engine
+import models.models  # noqa: F401 - registers models
+
+
+def migrate() -> list:
+    existing = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    return [name for name in Base.metadata.tables if name not in existing]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+    created = migrate()
+    print(f"{DATABASE_URL}: created {', '.join(created) if created else 'nothing, schema is up to date'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import threading
+import numpy as np
+import os
+
+BACKGROUND_SAMPLE_CAP = int(os.getenv("ML_EXPLAIN_BACKGROUND_CAP", "200"))
+# Sample-tree pairs walked at once by FlatForest.predict
+PREDICT_BLOCK = int(os.getenv("ML_FOREST_PREDICT_BLOCK", "1000000"))
+
+
+class LinearExplainer:
+    """Closed-form SHAP values of a linear model on standardized inputs:
+    phi_i = w_i * (x_i - E[x_i]) in log-odds space."""
+
+    def __init__(self, coef: np.ndarray, intercept: float, background: np.ndarray):
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.mean = background.mean(axis=0)
+        self.expected_value = float(intercept + self.coef @ self.mean)
+        self.global_importance = np.abs((background - self.mean) * self.coef).mean(axis=0)
+
+    def contributions(self, X_scaled: np.ndarray) -> np.ndarray:
+        return (X_scaled - self.mean) * self.coef
+
+
+class TreePathExplainer:
+    """Path attribution for tree ensembles: every split on a sample's path
+    credits the change in node mean to the split feature."""
+
+    def __init__(self, forest: "FlatForest", background: np.ndarray):
+        self.n_features = forest.n_features
+        self.left = forest.left
+        self.right = forest.right
+        self.feature = forest.feature
+        self.threshold = forest.threshold
+        self.value = forest.value
+        self.roots = forest.roots
+        self.expected_value = float(self.value[self.roots].mean())
+        self.global_importance = np.abs(self.contributions(background)).mean(axis=0)
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        # Trees compare float32 features against their thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n_samples, n_trees = len(X), len(self.roots)
+        rows = np.repeat(np.arange(n_samples), n_trees)
+        node = np.tile(self.roots, n_samples)
+        contrib = np.zeros((n_samples, self.n_features), dtype=np.float64)
+
+        active = self.left[node] >= 0
+        while active.any():
+            rows, node = rows[active], node[active]
+            feature = self.feature[node]
+            go_left = X[rows, feature] <= self.threshold[node]
+            child = np.where(go_left, self.left[node], self.right[node])
+            np.add.at(contrib, (rows, feature), self.value[child] - self.value[node])
+            node = child
+            active = self.left[node] >= 0
+
+        return contrib / n_trees
+
+
+def flatten_forest(forest) -> dict:
+    """Concatenate the node arrays of every tree, with child indices
+    rewritten to global offsets (-1 marks a leaf)."""
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        value.append(tree.value.reshape(tree.node_count, -1)[:, 0])
+        roots.append(offset)
+        offset += tree.node_count
+    return {
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "feature": np.concatenate(feature).astype(np.int64),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.array(roots, dtype=np.int64),
+    }
+
+
+class FlatForest:
+    """A fitted forest as the node arrays of flatten_forest. Predicts like
+    the scikit-learn estimator, and the arrays can be saved as .npy files
+    and used memory-mapped."""
+
+    FIELDS = ("left", "right", "feature", "threshold", "value", "roots")
+
+    def __init__(self, arrays: dict, n_features: int):
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.n_features = n_features
+
+    @classmethod
+    def from_forest(cls, forest) -> "FlatForest":
+        return cls(flatten_forest(forest), forest.n_features_in_)
+
+    @property
+    def arrays(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf reached in every tree, shape (n_samples, n_trees)."""
+        # Trees compare float32 features against their thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n_samples, n_trees = len(X), len(self.roots)
+        rows = np.repeat(np.arange(n_samples), n_trees)
+        node = np.tile(self.roots, n_samples)
+        leaf = node.copy()
+        pos = np.arange(len(node))
+
+        active = self.left[node] >= 0
+        while active.any():
+            pos, rows, node = pos[active], rows[active], node[active]
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            leaf[pos] = node
+            active = self.left[node] >= 0
+        return leaf.reshape(n_samples, n_trees)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        # Walk the trees a block of rows at a time to bound the index arrays
+        step = max(1, PREDICT_BLOCK // max(len(self.roots), 1))
+        return np.concatenate([
+            self.value[self.apply(X[start:start + step])].mean(axis=1)
+            for start in range(0, len(X), step)
+        ]) if len(X) else np.empty(0)
+
+
+def background_sample(X: np.ndarray, seed: int = 42) -> np.ndarray:
+    if len(X) <= BACKGROUND_SAMPLE_CAP:
+        return X.copy()
+    idx = np.random.default_rng(seed).choice(len(X), BACKGROUND_SAMPLE_CAP, replace=False)
+    return X[idx]
+
+
+class ExplainerCache:
+    """Builds explainers on first use and keeps one per model version."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, version: int, build):
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != version:
+                entry = (version, build())
+                self._entries[name] = entry
+        return entry[1]
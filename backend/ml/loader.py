@@ -0,0 +1,211 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from models.models import PlacementData
+import numpy as np
+import os
+
+ARTIFACT_DIR = os.getenv("ML_ARTIFACT_DIR", "./ml_artifacts")
+SNAPSHOT_DIR = os.path.join(ARTIFACT_DIR, "snapshots")
+LOAD_CHUNK_SIZE = int(os.getenv("ML_LOAD_CHUNK_SIZE", "10000"))
+
+NUMERIC_COLUMNS = [
+    "cgpa", "backlogs", "internships", "projects",
+    "certification_count", "aptitude_score", "communication_score",
+]
+
+
+@dataclass
+class TrainingData:
+    ids: np.ndarray
+    X: np.ndarray
+    placed: np.ndarray
+    salary: np.ndarray
+    department_classes: np.ndarray
+    gender_classes: np.ndarray
+    # Column -> values outside the fixed classes of an incremental load,
+    # which were encoded as code 0
+    unseen: dict = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class _CategoryEncoder:
+    """Assigns codes on first sight, remapped to sorted order like LabelEncoder."""
+
+    def __init__(self, classes: Optional[np.ndarray] = None):
+        self.fixed = classes is not None
+        self.index = {c: i for i, c in enumerate(classes)} if self.fixed else {}
+        self.unseen = set()
+
+    def encode(self, values) -> np.ndarray:
+        codes = np.empty(len(values), dtype=np.int64)
+        for i, v in enumerate(values):
+            v = v or "Unknown"
+            code = self.index.get(v)
+            if code is None:
+                if self.fixed:
+                    self.unseen.add(v)
+                    code = 0
+                else:
+                    code = self.index[v] = len(self.index)
+            codes[i] = code
+        return codes
+
+    def finish(self, codes: np.ndarray):
+        classes = np.array(sorted(self.index), dtype=object)
+        if self.fixed or not len(classes):
+            return np.array(list(self.index), dtype=object), codes
+        order = np.empty(len(classes), dtype=np.int64)
+        for new_code, c in enumerate(classes):
+            order[self.index[c]] = new_code
+        return classes, order[codes]
+
+
+def _snapshot_path(dataset_id: int) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"dataset_{dataset_id}.npz")
+
+
+def _dataset_signature(db: Session, dataset_id: int):
+    count, max_id = db.execute(
+        select(func.count(PlacementData.id), func.max(PlacementData.id))
+        .where(PlacementData.dataset_id == dataset_id)
+    ).one()
+    return int(count or 0), int(max_id or 0)
+
+
+def load_snapshot(dataset_id: int, signature) -> Optional[TrainingData]:
+    path = _snapshot_path(dataset_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=True) as snap:
+            if tuple(snap["signature"]) != tuple(signature):
+                return None
+            return TrainingData(
+                ids=snap["ids"], X=snap["X"], placed=snap["placed"],
+                salary=snap["salary"],
+                department_classes=snap["department_classes"],
+                gender_classes=snap["gender_classes"],
+            )
+    except Exception:
+        return None
+
+
+def save_snapshot(dataset_id: int, data: TrainingData, signature):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp_path = _snapshot_path(dataset_id) + ".tmp.npz"
+    np.savez(
+        tmp_path, signature=np.array(signature), ids=data.ids, X=data.X,
+        placed=data.placed, salary=data.salary,
+        department_classes=data.department_classes,
+        gender_classes=data.gender_classes,
+    )
+    os.replace(tmp_path, _snapshot_path(dataset_id))
+
+
+def invalidate_snapshot(dataset_id: int):
+    try:
+        os.remove(_snapshot_path(dataset_id))
+    except FileNotFoundError:
+        pass
+
+
+def load_training_arrays(
+    db: Session,
+    dataset_id: int,
+    min_id: Optional[int] = None,
+    department_classes: Optional[np.ndarray] = None,
+    gender_classes: Optional[np.ndarray] = None,
+    chunk_size: int = LOAD_CHUNK_SIZE,
+    use_snapshot: bool = True,
+) -> TrainingData:
+    """Stream the model columns of a dataset into typed arrays.
+
+    Full loads are served from the columnar snapshot when it matches the
+    table, and write a fresh snapshot otherwise. Passing ``min_id`` loads
+    only rows appended after that id, encoded with the given classes.
+    """
+    full_load = min_id is None and department_classes is None
+    signature = None
+    if full_load and use_snapshot:
+        signature = _dataset_signature(db, dataset_id)
+        snapshot = load_snapshot(dataset_id, signature)
+        if snapshot is not None:
+            return snapshot
+
+    conditions = [PlacementData.dataset_id == dataset_id]
+    if min_id is not None:
+        conditions.append(PlacementData.id > min_id)
+
+    n_rows = db.execute(
+        select(func.count(PlacementData.id)).where(*conditions)
+    ).scalar() or 0
+
+    ids = np.empty(n_rows, dtype=np.int64)
+    X = np.zeros((n_rows, len(NUMERIC_COLUMNS) + 2), dtype=np.float64)
+    placed = np.zeros(n_rows, dtype=np.int8)
+    salary = np.zeros(n_rows, dtype=np.float64)
+    dept_codes = np.zeros(n_rows, dtype=np.int64)
+    gender_codes = np.zeros(n_rows, dtype=np.int64)
+    dept_encoder = _CategoryEncoder(department_classes)
+    gender_encoder = _CategoryEncoder(gender_classes)
+
+    stmt = (
+        select(
+            PlacementData.id,
+            *[getattr(PlacementData, c) for c in NUMERIC_COLUMNS],
+            PlacementData.placed,
+            PlacementData.salary,
+            PlacementData.department,
+            PlacementData.gender,
+        )
+        .where(*conditions)
+        .order_by(PlacementData.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    n_numeric = len(NUMERIC_COLUMNS)
+    pos = 0
+    for chunk in db.execute(stmt).partitions():
+        # Rows may have been appended since the count; never overrun it
+        chunk = chunk[: n_rows - pos]
+        if not chunk:
+            break
+        end = pos + len(chunk)
+        block = np.array(chunk, dtype=object)
+        numeric = block[:, : n_numeric + 3]
+        numeric[numeric == None] = 0  # noqa: E711 - elementwise NULL check
+        numeric = numeric.astype(np.float64)
+
+        ids[pos:end] = numeric[:, 0]
+        X[pos:end, :n_numeric] = numeric[:, 1 : n_numeric + 1]
+        placed[pos:end] = numeric[:, n_numeric + 1] != 0
+        salary[pos:end] = numeric[:, n_numeric + 2]
+        dept_codes[pos:end] = dept_encoder.encode(block[:, n_numeric + 3])
+        gender_codes[pos:end] = gender_encoder.encode(block[:, n_numeric + 4])
+        pos = end
+
+    if pos < n_rows:
+        ids, X, placed, salary = ids[:pos], X[:pos], placed[:pos], salary[:pos]
+        dept_codes, gender_codes = dept_codes[:pos], gender_codes[:pos]
+
+    dept_classes, dept_codes = dept_encoder.finish(dept_codes)
+    gender_classes, gender_codes = gender_encoder.finish(gender_codes)
+    X[:, n_numeric] = dept_codes
+    X[:, n_numeric + 1] = gender_codes
+
+    data = TrainingData(
+        ids=ids, X=X, placed=placed, salary=salary,
+        department_classes=dept_classes, gender_classes=gender_classes,
+        unseen={
+            name: sorted(encoder.unseen)
+            for name, encoder in (("department", dept_encoder), ("gender", gender_encoder))
+            if encoder.unseen
+        },
+    )
+    if signature is not None and signature[0] == len(data):
+        save_snapshot(dataset_id, data, signature)
+    return data
@@ -0,0 +1,144 @@
+from sklearn.neighbors import KDTree
+from ml.loader import ARTIFACT_DIR, TrainingData
+import copy
+import threading
+import joblib
+import numpy as np
+import os
+
+INDEX_DIR = os.path.join(ARTIFACT_DIR, "neighbors")
+# New rows are searched brute-force until they reach this share of the tree
+REBUILD_FRACTION = float(os.getenv("ML_NEIGHBOR_REBUILD_FRACTION", "0.1"))
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+class StudentIndex:
+    def __init__(self, X: np.ndarray, ids: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                 department_classes: np.ndarray, gender_classes: np.ndarray):
+        self.mean = mean
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.department_classes = department_classes
+        self.gender_classes = gender_classes
+        self.ids = ids
+        self.tree = KDTree(self._scale(X), leaf_size=40)
+        self.delta_X = np.empty((0, X.shape[1]))
+        self.delta_ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids) + len(self.delta_ids)
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean) / self.scale
+
+    def encode(self, features: dict) -> np.ndarray:
+        def code(classes, value):
+            matches = np.flatnonzero(classes == value)
+            return matches[0] if len(matches) else 0
+
+        return np.array([[
+            features.get("cgpa", 0),
+            features.get("backlogs", 0),
+            features.get("internships", 0),
+            features.get("projects", 0),
+            features.get("certification_count", 0),
+            features.get("aptitude_score", 0),
+            features.get("communication_score", 0),
+            code(self.department_classes, features.get("department", "Unknown")),
+            code(self.gender_classes, features.get("gender", "Unknown")),
+        ]], dtype=np.float64)
+
+    def appended(self, X: np.ndarray, ids: np.ndarray) -> "StudentIndex":
+        """A new index with the rows added, sharing the tree. Indexes are
+        never changed in place, since queries may be reading this one."""
+        index = copy.copy(self)
+        index.delta_X = np.vstack([self.delta_X, self._scale(X)])
+        index.delta_ids = np.concatenate([self.delta_ids, ids])
+        return index
+
+    def needs_rebuild(self) -> bool:
+        return len(self.delta_ids) > REBUILD_FRACTION * len(self.ids)
+
+    def query(self, features: dict, k: int):
+        x = self._scale(self.encode(features))
+        dist, pos = self.tree.query(x, k=min(k, len(self.ids)))
+        ids, dist = self.ids[pos[0]], dist[0]
+
+        if len(self.delta_ids):
+            delta_dist = np.sqrt(((self.delta_X - x) ** 2).sum(axis=1))
+            ids = np.concatenate([ids, self.delta_ids])
+            dist = np.concatenate([dist, delta_dist])
+            order = np.argsort(dist, kind="stable")[:k]
+            ids, dist = ids[order], dist[order]
+        return ids, dist
+
+
+def _index_path(dataset_id: int) -> str:
+    return os.path.join(INDEX_DIR, f"dataset_{dataset_id}.joblib")
+
+
+def _stamp(dataset_id: int):
+    try:
+        st = os.stat(_index_path(dataset_id))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def _save(dataset_id: int, index: StudentIndex):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = _index_path(dataset_id) + ".tmp"
+    joblib.dump(index, tmp_path)
+    os.replace(tmp_path, _index_path(dataset_id))
+    with _lock:
+        _indexes[dataset_id] = (_stamp(dataset_id), index)
+
+
+def build_index(dataset_id: int, data: TrainingData, mean: np.ndarray, scale: np.ndarray) -> StudentIndex:
+    index = StudentIndex(
+        data.X, data.ids, mean, scale, data.department_classes, data.gender_classes,
+    )
+    _save(dataset_id, index)
+    return index
+
+
+def append_to_index(dataset_id: int, data: TrainingData):
+    index = get_index(dataset_id)
+    if index is None:
+        return
+    index = index.appended(data.X, data.ids)
+    if index.needs_rebuild():
+        X = np.vstack([np.asarray(index.tree.data) * index.scale + index.mean,
+                       index.delta_X * index.scale + index.mean])
+        index = StudentIndex(
+            X, np.concatenate([index.ids, index.delta_ids]), index.mean, index.scale,
+            index.department_classes, index.gender_classes,
+        )
+    _save(dataset_id, index)
+
+
+def get_index(dataset_id: int):
+    # Another worker may have rebuilt or appended to the index since it was
+    # loaded here, so the cached copy is checked against the file
+    stamp = _stamp(dataset_id)
+    entry = _indexes.get(dataset_id)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    if stamp is None:
+        return None
+    with _lock:
+        entry = _indexes.get(dataset_id)
+        if entry is None or entry[0] != stamp:
+            # Memory-mapped, so workers share the tree's arrays
+            entry = _indexes[dataset_id] = (stamp, joblib.load(_index_path(dataset_id), mmap_mode="r"))
+    return entry[1]
+
+
+def drop_index(dataset_id: int):
+    with _lock:
+        _indexes.pop(dataset_id, None)
+    try:
+        os.remove(_index_path(dataset_id))
+    except FileNotFoundError:
+        pass
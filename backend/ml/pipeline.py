@@ -1,20 +1,46 @@
-import pandas as pd
+from contextlib import contextmanager
+import math
+import threading
 import numpy as np
-from sklearn.linear_model import LogisticRegression
+import os
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
     mean_absolute_error, mean_squared_error, r2_score,
 )
 from sklearn.preprocessing import LabelEncoder, StandardScaler
-import json
+from ml.loader import TrainingData, load_training_arrays
+from ml.tuning import tune_placement_model, tune_salary_model
+from ml.neighbors import build_index, append_to_index
+from ml.explain import (
+    LinearExplainer, TreePathExplainer, ExplainerCache, FlatForest, background_sample,
+)
+from ml import shared
+
+SALARY_REFRESH_TREES = int(os.getenv("ML_SALARY_REFRESH_TREES", "10"))
+SALARY_MAX_TREES = int(os.getenv("ML_SALARY_MAX_TREES", "300"))
+SALARY_REFRESH_SAMPLE = int(os.getenv("ML_SALARY_REFRESH_SAMPLE", "2000"))
+WHAT_IF_MAX_POINTS = int(os.getenv("ML_WHAT_IF_MAX_POINTS", "2500"))
+DRIFT_THRESHOLD = float(os.getenv("ML_DRIFT_THRESHOLD", "0.2"))
+SALARY_DEFAULT_PARAMS = {"n_estimators": 100, "max_depth": 10}
+
+# Training state saved with each published version, so any worker can
+# continue from the estimators another worker fitted
+TRAINER_FIELDS = (
+    "placement_model", "salary_model", "le_dept", "le_gender", "scaler",
+    "placement_metrics", "salary_metrics", "placement_model_type", "dataset_id",
+    "last_record_id", "baseline_stats", "last_drift_report", "incremental_updates",
+    "_class_weight", "_salary_sample", "_placement_background", "_salary_background",
+    "_rng", "placement_params", "salary_params", "tuning_results",
+)
 
-try:
-    import shap
-    SHAP_AVAILABLE = True
-except ImportError:
-    SHAP_AVAILABLE = False
+
+def _sweep_points(sweep: dict) -> int:
+    # Values start, start + step, ... up to stop; the small tolerance keeps
+    # stop itself when the division lands just below a whole number
+    return math.floor((sweep["stop"] - sweep["start"]) / sweep["step"] + 1e-9) + 1
 
 
 class PlacementMLPipeline:
@@ -31,39 +57,124 @@ class PlacementMLPipeline:
         ]
         self.placement_metrics = {}
         self.salary_metrics = {}
-        self.shap_values_placement = None
-        self.shap_values_salary = None
-        self.feature_importance = []
-
-    def prepare_data(self, records: list) -> pd.DataFrame:
-        data = []
-        for r in records:
-            data.append({
-                "cgpa": r.cgpa or 0,
-                "backlogs": r.backlogs or 0,
-                "internships": r.internships or 0,
-                "projects": r.projects or 0,
-                "certification_count": r.certification_count or 0,
-                "aptitude_score": r.aptitude_score or 0,
-                "communication_score": r.communication_score or 0,
-                "department": r.department or "Unknown",
-                "gender": r.gender or "Unknown",
-                "placed": 1 if r.placed else 0,
-                "salary": r.salary or 0,
-            })
-        df = pd.DataFrame(data)
-
-        if len(df) < 10:
+        self.explainers = ExplainerCache()
+        # Predictions read the published version in self.shared; the
+        # estimators above only change inside training()
+        self.shared = None
+        self._shared_stamp = None
+        self._refresh_lock = threading.Lock()
+        self._trainer_version = 0
+        self._changed = False
+        self._placement_background = None
+        self._salary_background = None
+        self.placement_model_type = "logistic"
+        self.dataset_id = None
+        self.last_record_id = 0
+        self.baseline_stats = None
+        self.last_drift_report = None
+        self.incremental_updates = 0
+        self._class_weight = None
+        self._salary_sample = None
+        self._rng = np.random.default_rng(42)
+        self.placement_params = {}
+        self.salary_params = dict(SALARY_DEFAULT_PARAMS)
+        self.tuning_results = None
+
+    @property
+    def model_version(self) -> int:
+        return self.shared.version if self.shared is not None else 0
+
+    @property
+    def published_dataset_id(self):
+        """Dataset of the published models. Request handlers read this, since
+        dataset_id is training state that changes while a training runs."""
+        return self.shared.meta["dataset_id"] if self.shared is not None else None
+
+    def stale(self) -> bool:
+        return shared.current_stamp() != self._shared_stamp
+
+    def refresh(self):
+        """Switch to the latest published version if there is a newer one."""
+        stamp = shared.current_stamp()
+        if stamp == self._shared_stamp:
+            return
+        with self._refresh_lock:
+            if stamp == self._shared_stamp:
+                return
+            model = shared.load_current()
+            if model is not None:
+                self.shared = model
+                self.dataset_id = model.meta["dataset_id"]
+            self._shared_stamp = stamp
+
+    @contextmanager
+    def training(self):
+        """Hold the training lock of all workers, starting from the latest
+        published estimators, and publish the result if anything changed."""
+        with shared.exclusive():
+            self.refresh()
+            if self.shared is not None and self.shared.version != self._trainer_version:
+                for name, value in self.shared.load_trainer().items():
+                    setattr(self, name, value)
+                self._trainer_version = self.shared.version
+            self._changed = False
+            try:
+                yield
+            except BaseException:
+                # The estimators may be half updated; reload them next time
+                self._trainer_version = 0
+                raise
+            if self._changed:
+                self._publish()
+
+    def _publish(self):
+        arrays = {
+            "scaler_mean": self.scaler.mean_,
+            "scaler_scale": self.scaler.scale_,
+            "coef": self.placement_model.coef_,
+            "intercept": self.placement_model.intercept_,
+            "placement_background": self._placement_background,
+        }
+        if self.salary_model is not None:
+            forest = FlatForest.from_forest(self.salary_model)
+            arrays.update({f"forest_{name}": a for name, a in forest.arrays.items()})
+            arrays["salary_background"] = self._salary_background
+        meta = {
+            "dataset_id": self.dataset_id,
+            "placement_model_type": self.placement_model_type,
+            "placement_metrics": self.placement_metrics,
+            "salary_metrics": self.salary_metrics,
+            "salary_params": self.salary_params,
+            "incremental_updates": self.incremental_updates,
+            "drift": self.last_drift_report,
+            "tuning": self.tuning_results,
+            "department_classes": self.le_dept.classes_.tolist(),
+            "gender_classes": self.le_gender.classes_.tolist(),
+            "n_features": len(self.feature_names),
+        }
+        trainer = {name: getattr(self, name) for name in TRAINER_FIELDS}
+        self._trainer_version = shared.publish(arrays, meta, trainer)
+        self._changed = False
+        self.refresh()
+
+    def forget_dataset(self, dataset_id: int):
+        with self.training():
+            if self.dataset_id == dataset_id:
+                self.dataset_id = None
+                self._changed = self.placement_model is not None
+
+    def load_data(self, db, dataset_id: int) -> TrainingData:
+        data = load_training_arrays(db, dataset_id)
+        if len(data) < 10:
             return None
 
-        df["department_encoded"] = self.le_dept.fit_transform(df["department"])
-        df["gender_encoded"] = self.le_gender.fit_transform(df["gender"])
-
-        return df
+        self.le_dept.classes_ = data.department_classes
+        self.le_gender.classes_ = data.gender_classes
+        return data
 
-    def train_placement_model(self, df: pd.DataFrame):
-        X = df[self.feature_names]
-        y = df["placed"]
+    def train_placement_model(self, data: TrainingData, model_type: str = "logistic"):
+        X = data.X
+        y = data.placed
 
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
@@ -72,9 +183,23 @@ class PlacementMLPipeline:
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
 
-        self.placement_model = LogisticRegression(
-            max_iter=1000, random_state=42, class_weight="balanced"
-        )
+        if model_type == "sgd":
+            # partial_fit does not accept class_weight="balanced", so freeze
+            # the weights of the full run and reuse them for every update
+            counts = np.bincount(y_train, minlength=2)
+            self._class_weight = {
+                c: len(y_train) / (2 * max(counts[c], 1)) for c in (0, 1)
+            }
+            self.placement_model = SGDClassifier(
+                loss="log_loss", random_state=42, class_weight=self._class_weight,
+                **self.placement_params.get("sgd", {}),
+            )
+        else:
+            self.placement_model = LogisticRegression(
+                max_iter=1000, random_state=42, class_weight="balanced",
+                **self.placement_params.get("logistic", {}),
+            )
+        self.placement_model_type = model_type
         self.placement_model.fit(X_train_scaled, y_train)
         y_pred = self.placement_model.predict(X_test_scaled)
 
@@ -85,74 +210,219 @@ class PlacementMLPipeline:
             "f1_score": round(f1_score(y_test, y_pred, zero_division=0), 4),
         }
 
-        # SHAP
-        if SHAP_AVAILABLE:
-            try:
-                explainer = shap.LinearExplainer(self.placement_model, X_train_scaled)
-                shap_vals = explainer.shap_values(X_test_scaled)
-                importance = np.abs(shap_vals).mean(axis=0)
-                self.feature_importance = [
-                    {"feature": name, "importance": round(float(imp), 4)}
-                    for name, imp in sorted(
-                        zip(self.feature_names, importance),
-                        key=lambda x: x[1], reverse=True,
-                    )
-                ]
-            except Exception:
-                self._compute_coef_importance()
-        else:
-            self._compute_coef_importance()
-
-    def _compute_coef_importance(self):
-        if self.placement_model is not None:
-            coefs = np.abs(self.placement_model.coef_[0])
-            self.feature_importance = [
-                {"feature": name, "importance": round(float(imp), 4)}
-                for name, imp in sorted(
-                    zip(self.feature_names, coefs),
-                    key=lambda x: x[1], reverse=True,
-                )
-            ]
-
-    def train_salary_model(self, df: pd.DataFrame):
-        placed_df = df[df["placed"] == 1].copy()
-        placed_df = placed_df[placed_df["salary"] > 0]
-
-        if len(placed_df) < 10:
+        self.last_record_id = int(data.ids.max()) if len(data) else 0
+        self.incremental_updates = 0
+        self.last_drift_report = None
+        self.baseline_stats = {
+            "n_rows": len(data),
+            "mean": X.mean(axis=0),
+            "std": X.std(axis=0),
+            "placement_rate": float(y.mean()),
+            "accuracy": self.placement_metrics["accuracy"],
+        }
+
+        self._placement_background = background_sample(X_train)
+        self._changed = True
+
+    def train_salary_model(self, data: TrainingData):
+        mask = (data.placed == 1) & (data.salary > 0)
+
+        if mask.sum() < 10:
             self.salary_metrics = {"error": "Not enough data"}
             return
 
-        X = placed_df[self.feature_names]
-        y = placed_df["salary"]
+        X = data.X[mask]
+        y = data.salary[mask]
 
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
 
-        self.salary_model = RandomForestRegressor(
-            n_estimators=100, random_state=42, max_depth=10
-        )
+        self.salary_model = RandomForestRegressor(random_state=42, **self.salary_params)
         self.salary_model.fit(X_train, y_train)
         y_pred = self.salary_model.predict(X_test)
 
+        keep = self._rng.permutation(len(X))[:SALARY_REFRESH_SAMPLE]
+        self._salary_sample = (X[keep], y[keep])
+        self._salary_background = background_sample(X_train)
+        self._changed = True
+
         self.salary_metrics = {
             "mae": round(mean_absolute_error(y_test, y_pred), 4),
             "rmse": round(np.sqrt(mean_squared_error(y_test, y_pred)), 4),
             "r2_score": round(r2_score(y_test, y_pred), 4),
         }
 
-    def predict_placement(self, features: dict) -> dict:
-        if self.placement_model is None:
-            return {"error": "Model not trained"}
+    def tune_models(self, data: TrainingData, model_type: str = "logistic") -> dict:
+        placement = tune_placement_model(data, model_type)
+        salary = tune_salary_model(data)
+
+        self.placement_params[model_type] = placement["params"]
+        if "params" in salary:
+            self.salary_params = salary["params"]
+        self.tuning_results = {
+            "placement_model": dict(placement, model_type=model_type),
+            "salary_model": salary,
+        }
+        return self.tuning_results
+
+    def clear_tuning(self):
+        """Back to default hyperparameters, for a full run that does not tune."""
+        self.placement_params = {}
+        self.salary_params = dict(SALARY_DEFAULT_PARAMS)
+        self.tuning_results = None
+
+    def placement_explainer(self, model: shared.SharedModel) -> LinearExplainer:
+        return self.explainers.get("placement", model.version, lambda: LinearExplainer(
+            model.placement_model.coef_[0],
+            model.placement_model.intercept_[0],
+            model.scaler.transform(model.placement_background),
+        ))
+
+    def salary_explainer(self, model: shared.SharedModel) -> TreePathExplainer:
+        return self.explainers.get("salary", model.version, lambda: TreePathExplainer(
+            model.salary_model, model.salary_background,
+        ))
+
+    def _format_contributions(self, X: np.ndarray, contributions: np.ndarray) -> list:
+        return [
+            {"feature": name, "value": round(float(x), 4), "contribution": round(float(c), 4)}
+            for name, x, c in sorted(
+                zip(self.feature_names, X, contributions),
+                key=lambda item: abs(item[2]), reverse=True,
+            )
+        ]
+
+    def _format_importance(self, importance: np.ndarray) -> list:
+        return [
+            {"feature": name, "importance": round(float(imp), 4)}
+            for name, imp in sorted(
+                zip(self.feature_names, importance),
+                key=lambda x: x[1], reverse=True,
+            )
+        ]
+
+    def feature_importance(self, model: shared.SharedModel) -> list:
+        if model is None:
+            return []
+        return self._format_importance(self.placement_explainer(model).global_importance)
+
+    def salary_feature_importance(self, model: shared.SharedModel) -> list:
+        if model is None or model.salary_model is None:
+            return []
+        return self._format_importance(self.salary_explainer(model).global_importance)
+
+    def build_similarity_index(self, dataset_id: int, data: TrainingData):
+        return build_index(dataset_id, data, self.scaler.mean_, self.scaler.scale_)
+
+    def supports_incremental(self, dataset_id: int) -> bool:
+        # Checked against the published version, since this worker may not
+        # hold the estimators yet
+        model = self.shared
+        return (
+            model is not None
+            and model.meta["dataset_id"] == dataset_id
+            and model.meta["placement_model_type"] == "sgd"
+        )
+
+    def drift_report(self, data: TrainingData) -> dict:
+        base = self.baseline_stats
+        std = np.where(base["std"] > 0, base["std"], 1.0)
+        shift = (data.X.mean(axis=0) - base["mean"]) / std
+
+        X_scaled = self.scaler.transform(data.X)
+        accuracy = accuracy_score(data.placed, self.placement_model.predict(X_scaled))
+
+        drifted = [
+            name for name, s in zip(self.feature_names, shift)
+            if abs(s) > DRIFT_THRESHOLD
+        ]
+        return {
+            "new_rows": len(data),
+            "baseline_rows": base["n_rows"],
+            "feature_shift": {
+                name: round(float(s), 4) for name, s in zip(self.feature_names, shift)
+            },
+            "placement_rate": round(float(data.placed.mean()), 4),
+            "baseline_placement_rate": round(base["placement_rate"], 4),
+            "accuracy_on_new_rows": round(float(accuracy), 4),
+            "baseline_accuracy": base["accuracy"],
+            "drifted_features": drifted,
+            "drift_detected": bool(drifted or accuracy < base["accuracy"] - DRIFT_THRESHOLD / 2),
+        }
+
+    def update_from_db(self, db, dataset_id: int) -> dict:
+        if not (self.dataset_id == dataset_id and isinstance(self.placement_model, SGDClassifier)):
+            return {"error": "Incremental update needs a full 'sgd' training run on this dataset"}
+
+        data = load_training_arrays(
+            db, dataset_id, min_id=self.last_record_id,
+            department_classes=self.le_dept.classes_,
+            gender_classes=self.le_gender.classes_,
+        )
+        if not len(data):
+            return {"new_rows": 0, "drift": self.last_drift_report}
+        if data.unseen:
+            # The fixed encoding would fold them into the first class; they
+            # stay pending until a full training run adds them as classes
+            return {
+                "error": f"New rows have categories the model was not trained on: {data.unseen}. "
+                         "Run a full training to include them",
+                "new_rows": len(data),
+                "unseen_categories": data.unseen,
+            }
+        return self.update_models(data)
+
+    def update_models(self, data: TrainingData) -> dict:
+        # Drift is measured before the update, against the last full run
+        drift = self.drift_report(data)
+
+        self.scaler.partial_fit(data.X)
+        self.placement_model.partial_fit(self.scaler.transform(data.X), data.placed)
+
+        salary_trees = self._refresh_salary_model(data)
+        append_to_index(self.dataset_id, data)
+
+        self.last_record_id = max(self.last_record_id, int(data.ids.max()))
+        self.incremental_updates += 1
+        self.last_drift_report = drift
+        self._changed = True
+
+        return {
+            "new_rows": len(data),
+            "salary_trees_added": salary_trees,
+            "drift": drift,
+        }
+
+    def _refresh_salary_model(self, data: TrainingData) -> int:
+        mask = (data.placed == 1) & (data.salary > 0)
+        if self.salary_model is None or not mask.any():
+            return 0
+
+        X_new, y_new = data.X[mask], data.salary[mask]
+        X_old, y_old = self._salary_sample
+        X_fit = np.vstack([X_new, X_old])
+        y_fit = np.concatenate([y_new, y_old])
+
+        # Grow a few trees on the new rows plus a bounded sample of the old
+        # ones, then retire the oldest trees to keep the forest size bounded
+        n_new = SALARY_REFRESH_TREES
+        self.salary_model.set_params(
+            warm_start=True, n_estimators=len(self.salary_model.estimators_) + n_new
+        )
+        self.salary_model.fit(X_fit, y_fit)
+        excess = len(self.salary_model.estimators_) - SALARY_MAX_TREES
+        if excess > 0:
+            self.salary_model.estimators_ = self.salary_model.estimators_[excess:]
+            self.salary_model.n_estimators = len(self.salary_model.estimators_)
+
+        keep = self._rng.permutation(len(X_fit))[:SALARY_REFRESH_SAMPLE]
+        self._salary_sample = (X_fit[keep], y_fit[keep])
+        return n_new
 
-        try:
-            dept_encoded = self.le_dept.transform([features.get("department", "Unknown")])[0]
-        except ValueError:
-            dept_encoded = 0
-        try:
-            gender_encoded = self.le_gender.transform([features.get("gender", "Unknown")])[0]
-        except ValueError:
-            gender_encoded = 0
+    def _feature_vector(self, model: shared.SharedModel, features: dict) -> np.ndarray:
+        dept_encoded = model.department_codes.get(features.get("department", "Unknown"), 0)
+        gender_encoded = model.gender_codes.get(features.get("gender", "Unknown"), 0)
 
         feature_values = [
             features.get("cgpa", 0),
@@ -165,62 +435,129 @@ class PlacementMLPipeline:
             dept_encoded,
             gender_encoded,
         ]
+        return np.array([feature_values], dtype=np.float64)
 
-        X = np.array([feature_values])
-        X_scaled = self.scaler.transform(X)
-        proba = self.placement_model.predict_proba(X_scaled)[0]
+    def predict_placement(self, features: dict, explain: bool = False) -> dict:
+        model = self.shared
+        if model is None:
+            return {"error": "Model not trained"}
 
-        return {
+        X = self._feature_vector(model, features)
+        X_scaled = model.scaler.transform(X)
+        proba = model.placement_model.predict_proba(X_scaled)[0]
+
+        result = {
             "placed_probability": round(float(proba[1]) * 100, 2),
             "not_placed_probability": round(float(proba[0]) * 100, 2),
             "prediction": "Placed" if proba[1] > 0.5 else "Not Placed",
             "confidence": round(float(max(proba)) * 100, 2),
         }
-
-    def predict_salary(self, features: dict) -> dict:
-        if self.salary_model is None:
+        if explain:
+            explainer = self.placement_explainer(model)
+            result["explanation"] = {
+                "units": "log-odds",
+                "base_value": round(explainer.expected_value, 4),
+                "contributions": self._format_contributions(
+                    X[0], explainer.contributions(X_scaled)[0]
+                ),
+            }
+        return result
+
+    def predict_salary(self, features: dict, explain: bool = False) -> dict:
+        model = self.shared
+        if model is None or model.salary_model is None:
             return {"error": "Model not trained"}
 
-        try:
-            dept_encoded = self.le_dept.transform([features.get("department", "Unknown")])[0]
-        except ValueError:
-            dept_encoded = 0
-        try:
-            gender_encoded = self.le_gender.transform([features.get("gender", "Unknown")])[0]
-        except ValueError:
-            gender_encoded = 0
+        X = self._feature_vector(model, features)
+        prediction = model.salary_model.predict(X)[0]
 
-        feature_values = [
-            features.get("cgpa", 0),
-            features.get("backlogs", 0),
-            features.get("internships", 0),
-            features.get("projects", 0),
-            features.get("certification_count", 0),
-            features.get("aptitude_score", 0),
-            features.get("communication_score", 0),
-            dept_encoded,
-            gender_encoded,
-        ]
+        result = {
+            "predicted_salary": round(float(prediction), 2),
+        }
+        if explain:
+            explainer = self.salary_explainer(model)
+            result["explanation"] = {
+                "units": "LPA",
+                "base_value": round(explainer.expected_value, 4),
+                "contributions": self._format_contributions(
+                    X[0], explainer.contributions(X)[0]
+                ),
+            }
+        return result
+
+    def what_if(self, features: dict, sweeps: list) -> dict:
+        # The grid size is known from the sweeps alone, so oversized
+        # requests are turned away before any array is allocated
+        shape = []
+        for sweep in sweeps:
+            if sweep["stop"] < sweep["start"]:
+                return {"error": f"Sweep for {sweep['feature']} has stop < start"}
+            shape.append(_sweep_points(sweep))
+        if math.prod(shape) > WHAT_IF_MAX_POINTS:
+            return {"error": f"Sweep grid has more than {WHAT_IF_MAX_POINTS} points"}
+        shape = tuple(shape)
+
+        model = self.shared
+        if model is None:
+            return {"error": "Model not trained"}
 
-        X = np.array([feature_values])
-        prediction = self.salary_model.predict(X)[0]
+        axes = [
+            (self.feature_names.index(sweep["feature"]),
+             np.round(sweep["start"] + sweep["step"] * np.arange(n), 4))
+            for sweep, n in zip(sweeps, shape)
+        ]
 
-        return {
-            "predicted_salary": round(float(prediction), 2),
+        # One row per grid point: the base profile with the swept columns overwritten
+        base = self._feature_vector(model, features)
+        mesh = np.meshgrid(*[values for _, values in axes], indexing="ij")
+        X = np.repeat(base, mesh[0].size, axis=0)
+        for (column, _), grid in zip(axes, mesh):
+            X[:, column] = grid.ravel()
+
+        # The base profile goes in as the last row, so it is scored by the
+        # same model version as the grid
+        X = np.vstack([X, base])
+        placed = model.placement_model.predict_proba(model.scaler.transform(X))[:, 1]
+        surface = {
+            "axes": [
+                {"feature": self.feature_names[column], "values": values.tolist()}
+                for column, values in axes
+            ],
+            "base": {
+                "placed_probability": round(float(placed[-1]) * 100, 2),
+            },
+            "placed_probability": np.round(placed[:-1] * 100, 2).reshape(shape).tolist(),
+            "predicted_salary": None,
         }
+        if model.salary_model is not None:
+            salary = model.salary_model.predict(X)
+            surface["base"]["predicted_salary"] = round(float(salary[-1]), 2)
+            surface["predicted_salary"] = np.round(salary[:-1], 2).reshape(shape).tolist()
+        return surface
 
     def get_model_info(self) -> dict:
+        model = self.shared
+        meta = model.meta if model is not None else {}
         return {
             "placement_model": {
-                "type": "Logistic Regression",
-                "metrics": self.placement_metrics,
-                "feature_importance": self.feature_importance,
+                "type": (
+                    "SGD Logistic Classifier (incremental)"
+                    if meta.get("placement_model_type") == "sgd" else "Logistic Regression"
+                ),
+                "metrics": meta.get("placement_metrics", {}),
+                "feature_importance": self.feature_importance(model),
+                "incremental_updates": meta.get("incremental_updates", 0),
+                "drift": meta.get("drift"),
             },
             "salary_model": {
                 "type": "Random Forest Regressor",
-                "metrics": self.salary_metrics,
+                "metrics": meta.get("salary_metrics", {}),
+                "params": meta.get("salary_params", self.salary_params),
+                "feature_importance": self.salary_feature_importance(model),
             },
             "features_used": self.feature_names,
+            "tuning": meta.get("tuning"),
+            "model_version": self.model_version,
         }
 
 
@@ -0,0 +1,57 @@
+"""Lightweight access to the ML stack for request handlers.
+
+Importing ml.pipeline pulls in scikit-learn, scipy and numpy, which
+takes longer than the rest of the app combined. Routes go through this
+module instead, so those imports happen the first time a handler needs
+them rather than when a worker starts.
+"""
+import asyncio
+import os
+import threading
+from starlette.concurrency import run_in_threadpool
+
+# Import the ML stack in the background right after startup, so the
+# first training or prediction request does not pay for it
+ML_WARMUP = os.getenv("ML_WARMUP", "0") == "1"
+
+# Queues training requests in this worker. Predictions read published
+# model versions and do not need it; see ml.shared
+model_lock = asyncio.Lock()
+
+_pipeline = None
+_import_lock = threading.Lock()
+
+
+def get_pipeline():
+    """The shared pipeline, switched to the latest published models.
+    Imports the ML stack on first call, so call it from a worker thread
+    unless load_pipeline() has already run."""
+    global _pipeline
+    if _pipeline is None:
+        with _import_lock:
+            if _pipeline is None:
+                from ml.pipeline import pipeline
+                _pipeline = pipeline
+    _pipeline.refresh()
+    return _pipeline
+
+
+async def load_pipeline():
+    # Mapping a new model version reads a few files, so that also goes
+    # to the threadpool; otherwise this is a stat call
+    if _pipeline is None or _pipeline.stale():
+        return await run_in_threadpool(get_pipeline)
+    return _pipeline
+
+
+def rescore(dataset_id: int):
+    """Rebuild the dataset's placement_scores with the latest models; run
+    as a background task after every change that makes them stale."""
+    from ml.scoring import score_dataset_job
+    score_dataset_job(get_pipeline(), dataset_id)
+
+
+def warm_up():
+    get_pipeline()
+    import ml.scoring  # noqa: F401
+    import pandas  # noqa: F401
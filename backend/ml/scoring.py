@@ -0,0 +1,87 @@
+from datetime import datetime
+from sqlalchemy import select, insert, delete
+from sqlalchemy.orm import Session
+from database.db import SessionLocal
+from models.models import PlacementData, PlacementScore
+from ml.loader import load_training_arrays
+from utils.metrics import time_phase
+import numpy as np
+import pandas as pd
+
+INSERT_BATCH_SIZE = 10000
+
+
+@time_phase("scoring")
+def score_dataset(db: Session, pipeline, dataset_id: int) -> int:
+    model = pipeline.shared
+    if model is None:
+        return 0
+
+    data = load_training_arrays(db, dataset_id)
+    if not len(data):
+        return 0
+
+    # The stored feature codes follow this dataset's classes, which may
+    # differ from the encoders the models were trained with
+    X = data.X.copy()
+    X[:, -2] = _recode(data.department_classes, X[:, -2], model.department_classes)
+    X[:, -1] = _recode(data.gender_classes, X[:, -1], model.gender_classes)
+
+    proba = model.placement_model.predict_proba(model.scaler.transform(X))[:, 1] * 100
+    salary = (
+        model.salary_model.predict(X) if model.salary_model is not None
+        else np.full(len(X), np.nan)
+    )
+
+    cohorts = pd.DataFrame(
+        db.execute(
+            select(PlacementData.id, PlacementData.department, PlacementData.batch_year)
+            .where(PlacementData.dataset_id == dataset_id)
+            .order_by(PlacementData.id)
+        ).all(),
+        columns=["id", "department", "batch_year"],
+    ).set_index("id").reindex(data.ids)
+    percentile = (
+        pd.Series(proba, index=cohorts.index)
+        .groupby([cohorts["department"].fillna(""), cohorts["batch_year"].fillna(0)])
+        .rank(pct=True, method="max")
+        .to_numpy() * 100
+    )
+
+    scored_at = datetime.utcnow()
+    rows = [
+        {
+            "record_id": int(record_id),
+            "dataset_id": dataset_id,
+            "department": dept,
+            "batch_year": None if pd.isna(year) else int(year),
+            "placed_probability": round(float(p), 4),
+            "predicted_salary": None if np.isnan(s) else round(float(s), 4),
+            "percentile": round(float(pct), 4),
+            "model_version": model.version,
+            "scored_at": scored_at,
+        }
+        for record_id, dept, year, p, s, pct in zip(
+            data.ids, cohorts["department"], cohorts["batch_year"], proba, salary, percentile,
+        )
+    ]
+
+    db.execute(delete(PlacementScore).where(PlacementScore.dataset_id == dataset_id))
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.execute(insert(PlacementScore), rows[start:start + INSERT_BATCH_SIZE])
+    db.commit()
+    return len(rows)
+
+
+def _recode(source_classes: np.ndarray, codes: np.ndarray, target_classes: np.ndarray) -> np.ndarray:
+    lookup = {c: i for i, c in enumerate(target_classes)}
+    mapping = np.array([lookup.get(c, 0) for c in source_classes], dtype=np.float64)
+    return mapping[codes.astype(np.int64)] if len(mapping) else codes
+
+
+def score_dataset_job(pipeline, dataset_id: int):
+    db = SessionLocal()
+    try:
+        score_dataset(db, pipeline, dataset_id)
+    finally:
+        db.close()
@@ -0,0 +1,201 @@
+"""Trained model parameters shared by all workers as memory-mapped files.
+
+Every publish writes a new version directory of .npy arrays and a JSON
+manifest, then points CURRENT at it with an atomic rename. Workers map
+the arrays read-only, so the page cache holds a single copy however
+many workers serve them, and switch to a new version on their next
+request. The fitted scikit-learn estimators are stored next to the
+arrays for whichever worker runs the next training step.
+"""
+from contextlib import contextmanager
+from typing import Optional
+from scipy.special import expit
+from ml.loader import ARTIFACT_DIR
+from ml.explain import FlatForest
+import json
+import os
+import shutil
+import tempfile
+import joblib
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MODEL_DIR = os.path.join(ARTIFACT_DIR, "models")
+CURRENT_PATH = os.path.join(MODEL_DIR, "CURRENT")
+LOCK_PATH = os.path.join(MODEL_DIR, ".lock")
+MANIFEST = "manifest.json"
+TRAINER = "trainer.joblib"
+KEEP_VERSIONS = int(os.getenv("ML_MODEL_KEEP_VERSIONS", "3"))
+# Times CURRENT is re-read when the version it names was just pruned
+LOAD_RETRIES = 3
+
+
+class Standardizer:
+    """StandardScaler.transform from its fitted mean and scale."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean_) / self.scale_
+
+
+class LinearClassifier:
+    """predict_proba of a binary logistic model from its coefficients."""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray):
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        placed = expit(X @ self.coef_[0] + self.intercept_[0])
+        return np.column_stack([1 - placed, placed])
+
+
+class SharedModel:
+    """One published version, with its arrays mapped read-only."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.path = _version_path(version)
+        with open(os.path.join(self.path, MANIFEST)) as f:
+            self.meta = json.load(f)
+        arrays = {
+            name[:-4]: np.load(os.path.join(self.path, name), mmap_mode="r")
+            for name in os.listdir(self.path) if name.endswith(".npy")
+        }
+        self.scaler = Standardizer(arrays["scaler_mean"], arrays["scaler_scale"])
+        self.placement_model = LinearClassifier(arrays["coef"], arrays["intercept"])
+        self.placement_background = arrays["placement_background"]
+        self.salary_model = None
+        self.salary_background = None
+        if "forest_roots" in arrays:
+            self.salary_model = FlatForest(
+                {name: arrays[f"forest_{name}"] for name in FlatForest.FIELDS},
+                self.meta["n_features"],
+            )
+            self.salary_background = arrays["salary_background"]
+        self.department_classes = np.array(self.meta["department_classes"], dtype=object)
+        self.gender_classes = np.array(self.meta["gender_classes"], dtype=object)
+        self.department_codes = {c: i for i, c in enumerate(self.meta["department_classes"])}
+        self.gender_codes = {c: i for i, c in enumerate(self.meta["gender_classes"])}
+
+    def load_trainer(self) -> dict:
+        return joblib.load(os.path.join(self.path, TRAINER))
+
+
+def _version_path(version: int) -> str:
+    return os.path.join(MODEL_DIR, f"v{version:06d}")
+
+
+def _versions() -> list:
+    if not os.path.isdir(MODEL_DIR):
+        return []
+    return sorted(
+        int(name[1:]) for name in os.listdir(MODEL_DIR)
+        if name.startswith("v") and name[1:].isdigit()
+    )
+
+
+def _json_default(value):
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after ten one-second attempts; keep waiting
+            continue
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def exclusive():
+    """Serialize training and publishing across worker processes."""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(LOCK_PATH, "w") as lock:
+        _lock(lock)
+        try:
+            yield
+        finally:
+            _unlock(lock)
+
+
+def publish(arrays: dict, meta: dict, trainer: dict) -> int:
+    """Write a new version and make it current; hold exclusive() while calling."""
+    version = max(_versions(), default=0) + 1
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=MODEL_DIR)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(staging, MANIFEST), "w") as f:
+            json.dump(dict(meta, version=version), f, default=_json_default)
+        joblib.dump(trainer, os.path.join(staging, TRAINER))
+        os.rename(staging, _version_path(version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    tmp_path = CURRENT_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, CURRENT_PATH)
+
+    # Workers still mapping a removed version keep their pages until they
+    # switch, so older directories can go as soon as CURRENT has moved
+    for old in _versions()[:-KEEP_VERSIONS]:
+        shutil.rmtree(_version_path(old), ignore_errors=True)
+    return version
+
+
+def current_stamp():
+    """Changes whenever CURRENT is replaced; a stat call, cheap per request."""
+    try:
+        st = os.stat(CURRENT_PATH)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def load_current() -> Optional[SharedModel]:
+    for _ in range(LOAD_RETRIES):
+        try:
+            with open(CURRENT_PATH) as f:
+                version = int(f.read())
+        except FileNotFoundError:
+            return None
+        try:
+            return SharedModel(version)
+        except FileNotFoundError:
+            # Pruned by later publishes since CURRENT was read
+            continue
+    # CURRENT names a version that is gone, e.g. deleted by hand: serve the
+    # newest complete one left until the next publish moves CURRENT
+    for version in reversed(_versions()):
+        try:
+            return SharedModel(version)
+        except FileNotFoundError:
+            continue
+    return None
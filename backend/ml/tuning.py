@@ -0,0 +1,161 @@
+from joblib import Parallel, delayed
+from scipy.stats import loguniform
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import (
+    KFold, StratifiedKFold, ParameterSampler, cross_val_score,
+)
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+import numpy as np
+import os
+
+CV_FOLDS = int(os.getenv("ML_CV_FOLDS", "5"))
+SEARCH_MAX_CANDIDATES = int(os.getenv("ML_SEARCH_MAX_CANDIDATES", "24"))
+SEARCH_PATIENCE = int(os.getenv("ML_SEARCH_PATIENCE", "2"))
+SEARCH_TOL = float(os.getenv("ML_SEARCH_TOL", "0.002"))
+N_JOBS = int(os.getenv("ML_N_JOBS", "-1"))
+FOLD_CACHE_SIZE = 8
+
+PLACEMENT_SEARCH_SPACES = {
+    "logistic": {"C": loguniform(1e-3, 1e2)},
+    "sgd": {"alpha": loguniform(1e-6, 1e-2)},
+}
+SALARY_SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200, 300],
+    "max_depth": [5, 8, 10, 15, None],
+    "min_samples_leaf": [1, 2, 4, 8],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+
+_fold_cache = {}
+
+
+def cached_folds(ids: np.ndarray, y: np.ndarray, stratified: bool, n_splits: int = CV_FOLDS):
+    # Rows are identified by their ids, so the same dataset maps to the
+    # same folds across tuning runs and both models
+    key = (stratified, n_splits, len(ids), hash(ids.tobytes()))
+    folds = _fold_cache.get(key)
+    if folds is None:
+        splitter = (
+            StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+            if stratified else KFold(n_splits=n_splits, shuffle=True, random_state=42)
+        )
+        folds = list(splitter.split(np.zeros(len(y)), y))
+        if len(_fold_cache) >= FOLD_CACHE_SIZE:
+            _fold_cache.pop(next(iter(_fold_cache)))
+        _fold_cache[key] = folds
+    return folds
+
+
+def _fit_and_score(estimator, X, y, train_idx, test_idx, scoring):
+    estimator.fit(X[train_idx], y[train_idx])
+    return get_scorer(scoring)(estimator, X[test_idx], y[test_idx])
+
+
+def randomized_search(estimator, space, X, y, folds, scoring, n_jobs=N_JOBS):
+    """Evaluate sampled candidates in parallel batches until the best
+    cross-validated score stops improving."""
+    candidates = list(ParameterSampler(space, n_iter=SEARCH_MAX_CANDIDATES, random_state=42))
+    batch_size = max(2, os.cpu_count() or 1) if n_jobs == -1 else max(2, n_jobs)
+
+    best = {"params": None, "scores": None, "mean": -np.inf}
+    stale_batches = 0
+    evaluated = 0
+    stopped_early = False
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            scores = parallel(
+                delayed(_fit_and_score)(
+                    clone(estimator).set_params(**params), X, y, tr, te, scoring
+                )
+                for params in batch
+                for tr, te in folds
+            )
+            scores = np.array(scores).reshape(len(batch), len(folds))
+            evaluated += len(batch)
+
+            i = int(scores.mean(axis=1).argmax())
+            if scores[i].mean() > best["mean"] + SEARCH_TOL:
+                best = {"params": batch[i], "scores": scores[i], "mean": scores[i].mean()}
+                stale_batches = 0
+            else:
+                if scores[i].mean() > best["mean"]:
+                    best = {"params": batch[i], "scores": scores[i], "mean": scores[i].mean()}
+                stale_batches += 1
+                if stale_batches >= SEARCH_PATIENCE:
+                    stopped_early = start + batch_size < len(candidates)
+                    break
+
+    return {
+        "params": best["params"],
+        "cv_scores": best["scores"],
+        "candidates_evaluated": evaluated,
+        "stopped_early": stopped_early,
+    }
+
+
+def _strip_step(params: dict) -> dict:
+    return {k.split("__", 1)[-1]: _plain(v) for k, v in params.items()}
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def tune_placement_model(data, model_type: str = "logistic") -> dict:
+    if model_type == "sgd":
+        model = SGDClassifier(loss="log_loss", random_state=42, class_weight="balanced")
+    else:
+        model = LogisticRegression(max_iter=1000, random_state=42, class_weight="balanced")
+    estimator = make_pipeline(StandardScaler(), model)
+    step = estimator.steps[-1][0]
+    space = {
+        f"{step}__{k}": v for k, v in PLACEMENT_SEARCH_SPACES[model_type].items()
+    }
+
+    folds = cached_folds(data.ids, data.placed, stratified=True)
+    result = randomized_search(estimator, space, data.X, data.placed, folds, "f1")
+    accuracy = cross_val_score(
+        clone(estimator).set_params(**result["params"]), data.X, data.placed,
+        cv=folds, scoring="accuracy", n_jobs=N_JOBS,
+    )
+    return {
+        "params": _strip_step(result["params"]),
+        "cv_folds": len(folds),
+        "cv_f1": round(float(result["cv_scores"].mean()), 4),
+        "cv_f1_std": round(float(result["cv_scores"].std()), 4),
+        "cv_accuracy": round(float(accuracy.mean()), 4),
+        "candidates_evaluated": result["candidates_evaluated"],
+        "stopped_early": result["stopped_early"],
+    }
+
+
+def tune_salary_model(data) -> dict:
+    mask = (data.placed == 1) & (data.salary > 0)
+    if mask.sum() < 10 * CV_FOLDS:
+        return {"error": "Not enough data"}
+
+    X, y = data.X[mask], data.salary[mask]
+    estimator = RandomForestRegressor(random_state=42, n_jobs=1)
+    folds = cached_folds(data.ids[mask], y, stratified=False)
+    result = randomized_search(
+        estimator, SALARY_SEARCH_SPACE, X, y, folds, "neg_mean_absolute_error"
+    )
+    r2 = cross_val_score(
+        clone(estimator).set_params(**result["params"]), X, y,
+        cv=folds, scoring="r2", n_jobs=N_JOBS,
+    )
+    return {
+        "params": _strip_step(result["params"]),
+        "cv_folds": len(folds),
+        "cv_mae": round(float(-result["cv_scores"].mean()), 4),
+        "cv_mae_std": round(float(result["cv_scores"].std()), 4),
+        "cv_r2": round(float(r2.mean()), 4),
+        "candidates_evaluated": result["candidates_evaluated"],
+        "stopped_early": result["stopped_early"],
+    }
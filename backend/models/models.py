@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum
+    Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum, Index
 )
 from sqlalchemy.orm import relationship
 from database.db import Base
@@ -68,6 +68,38 @@ class Dataset(Base):
     records = relationship("PlacementData", back_populates="dataset")
 
 
+class PlacementScore(Base):
+    __tablename__ = "placement_scores"
+    __table_args__ = (
+        # Cohort rankings are answered straight from these indexes
+        Index("ix_placement_scores_cohort_rank", "dataset_id", "department", "batch_year", "placed_probability"),
+        Index("ix_placement_scores_dataset_rank", "dataset_id", "placed_probability"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    record_id = Column(Integer, ForeignKey("placement_data.id"), nullable=False, unique=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False)
+    department = Column(String(100))
+    batch_year = Column(Integer)
+    placed_probability = Column(Float)  # 0-100
+    predicted_salary = Column(Float)  # in LPA
+    percentile = Column(Float)  # of placed_probability within department and batch year
+    model_version = Column(Integer)
+    scored_at = Column(DateTime, default=datetime.utcnow)
+
+    record = relationship("PlacementData")
+
+
+class DatasetProfile(Base):
+    __tablename__ = "dataset_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False, unique=True)
+    summary = Column(Text, nullable=False)  # JSON, served as is
+    sketches = Column(Text)  # JSON distinct-count state, to merge appended rows
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database.db import get_db
-from models.models import PlacementData, Dataset, User
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from database.db import get_async_read_db
+from database.queries import latest_dataset_id
+from models.models import PlacementData, User
 from auth.auth import get_current_user
 from typing import Optional
 from collections import Counter
@@ -10,22 +12,28 @@ from collections import Counter
 router = APIRouter()
 
 
-def get_latest_dataset_id(db: Session) -> int:
-    ds = db.query(Dataset).order_by(Dataset.uploaded_at.desc()).first()
-    if not ds:
+async def get_latest_dataset_id(db: AsyncSession) -> int:
+    ds_id = await latest_dataset_id(db)
+    if ds_id is None:
         raise HTTPException(status_code=404, detail="No dataset uploaded yet")
-    return ds.id
+    return ds_id
 
 
 @router.get("/overview")
 async def get_overview(
     dataset_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    ds_id = dataset_id or get_latest_dataset_id(db)
-    records = db.query(PlacementData).filter(PlacementData.dataset_id == ds_id).all()
+    ds_id = dataset_id or await get_latest_dataset_id(db)
+    records = (await db.execute(
+        select(PlacementData.placed, PlacementData.salary)
+        .where(PlacementData.dataset_id == ds_id)
+    )).all()
+    return await run_in_threadpool(_overview, records)
 
+
+def _overview(records: list) -> dict:
     if not records:
         return {
             "total_students": 0, "total_placed": 0, "placement_percentage": 0,
@@ -50,15 +58,21 @@ async def get_overview(
 async def get_department_analytics(
     dataset_id: Optional[int] = None,
     batch_year: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    ds_id = dataset_id or get_latest_dataset_id(db)
-    query = db.query(PlacementData).filter(PlacementData.dataset_id == ds_id)
+    ds_id = dataset_id or await get_latest_dataset_id(db)
+    query = (
+        select(PlacementData.department, PlacementData.placed, PlacementData.salary)
+        .where(PlacementData.dataset_id == ds_id)
+    )
     if batch_year:
-        query = query.filter(PlacementData.batch_year == batch_year)
-    records = query.all()
+        query = query.where(PlacementData.batch_year == batch_year)
+    records = (await db.execute(query)).all()
+    return await run_in_threadpool(_department_analytics, records)
+
 
+def _department_analytics(records: list) -> list:
     dept_data = {}
     for r in records:
         dept = r.department
@@ -90,16 +104,22 @@ async def get_department_analytics(
 @router.get("/salary")
 async def get_salary_analysis(
     dataset_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    ds_id = dataset_id or get_latest_dataset_id(db)
-    records = db.query(PlacementData).filter(
-        PlacementData.dataset_id == ds_id,
-        PlacementData.placed == True,
-        PlacementData.salary > 0,
-    ).all()
+    ds_id = dataset_id or await get_latest_dataset_id(db)
+    records = (await db.execute(
+        select(PlacementData.batch_year, PlacementData.department, PlacementData.salary)
+        .where(
+            PlacementData.dataset_id == ds_id,
+            PlacementData.placed == True,
+            PlacementData.salary > 0,
+        )
+    )).all()
+    return await run_in_threadpool(_salary_analysis, records)
+
 
+def _salary_analysis(records: list) -> dict:
     # Distribution bins
     salaries = [r.salary for r in records]
     if not salaries:
@@ -164,15 +184,21 @@ async def get_salary_analysis(
 @router.get("/companies")
 async def get_company_insights(
     dataset_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    ds_id = dataset_id or get_latest_dataset_id(db)
-    records = db.query(PlacementData).filter(
-        PlacementData.dataset_id == ds_id,
-        PlacementData.placed == True,
-    ).all()
+    ds_id = dataset_id or await get_latest_dataset_id(db)
+    records = (await db.execute(
+        select(PlacementData.company_name, PlacementData.salary)
+        .where(
+            PlacementData.dataset_id == ds_id,
+            PlacementData.placed == True,
+        )
+    )).all()
+    return await run_in_threadpool(_company_insights, records)
 
+
+def _company_insights(records: list) -> list:
     company_data = {}
     for r in records:
         c = r.company_name or "Unknown"
@@ -202,15 +228,21 @@ async def get_company_insights(
 async def get_skills_analysis(
     dataset_id: Optional[int] = None,
     department: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    ds_id = dataset_id or get_latest_dataset_id(db)
-    query = db.query(PlacementData).filter(PlacementData.dataset_id == ds_id)
+    ds_id = dataset_id or await get_latest_dataset_id(db)
+    query = (
+        select(PlacementData.skills, PlacementData.salary)
+        .where(PlacementData.dataset_id == ds_id)
+    )
     if department:
-        query = query.filter(PlacementData.department == department)
-    records = query.all()
+        query = query.where(PlacementData.department == department)
+    records = (await db.execute(query)).all()
+    return await run_in_threadpool(_skills_analysis, records)
+
 
+def _skills_analysis(records: list) -> dict:
     skill_counts = Counter()
     skill_salaries = {}
 
@@ -256,30 +288,28 @@ async def get_skills_analysis(
 @router.get("/batch-years")
 async def get_batch_years(
     dataset_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    ds_id = dataset_id or get_latest_dataset_id(db)
-    years = (
-        db.query(PlacementData.batch_year)
-        .filter(PlacementData.dataset_id == ds_id)
+    ds_id = dataset_id or await get_latest_dataset_id(db)
+    years = (await db.execute(
+        select(PlacementData.batch_year)
+        .where(PlacementData.dataset_id == ds_id)
         .distinct()
-        .all()
-    )
+    )).all()
     return sorted([y[0] for y in years])
 
 
 @router.get("/departments")
 async def get_departments(
     dataset_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    ds_id = dataset_id or get_latest_dataset_id(db)
-    depts = (
-        db.query(PlacementData.department)
-        .filter(PlacementData.dataset_id == ds_id)
+    ds_id = dataset_id or await get_latest_dataset_id(db)
+    depts = (await db.execute(
+        select(PlacementData.department)
+        .where(PlacementData.dataset_id == ds_id)
         .distinct()
-        .all()
-    )
+    )).all()
     return sorted([d[0] for d in depts])
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
-from database.db import get_db
+from database.db import AsyncSessionLocal, get_async_db, get_async_read_db
 from models.models import User
 from auth.auth import (
-    get_password_hash, verify_password, create_access_token, get_current_user
+    create_access_token, get_current_user_record, token_claims, password_hasher
 )
+from services.audit import audit_log
 
 router = APIRouter()
 
@@ -37,29 +39,33 @@ class Token(BaseModel):
 
 
 @router.post("/register", response_model=Token)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check existing
-    existing = db.query(User).filter(
-        (User.username == user_data.username) | (User.email == user_data.email)
-    ).first()
+    existing = (await db.execute(
+        select(User).where(
+            (User.username == user_data.username) | (User.email == user_data.email)
+        ).limit(1)
+    )).scalar_one_or_none()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already registered",
         )
+    # Hand the connection back to the pool while bcrypt runs
+    await db.close()
 
     user = User(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
-    access_token = create_access_token(data={"sub": user.username, "role": user.role})
+    access_token = create_access_token(data=token_claims(user))
     return Token(
         access_token=access_token,
         token_type="bearer",
@@ -69,24 +75,44 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = (await db.execute(
+        select(User).where(User.username == form_data.username)
+    )).scalar_one_or_none()
+    # Hand the connection back to the pool while bcrypt runs; the loaded
+    # attributes stay readable on the detached user
+    await db.close()
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not verified:
+        await audit_log.record("login_failed", request, user, username=form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
 
-    access_token = create_access_token(data={"sub": user.username, "role": user.role})
-    return Token(
+    access_token = create_access_token(data=token_claims(user))
+    token = Token(
         access_token=access_token,
         token_type="bearer",
         user=UserResponse.model_validate(user),
     )
+    if new_hash:
+        # Stored with an outdated work factor: upgrade it while we have the password
+        user.hashed_password = new_hash
+        async with AsyncSessionLocal() as write_db:
+            write_db.add(user)
+            await write_db.commit()
+    await audit_log.record("login", request, user)
+    return token
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user_record)):
     return UserResponse.model_validate(current_user)
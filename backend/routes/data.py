@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
-from database.db import get_db
-from models.models import PlacementData, Dataset, User
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, UploadFile, File
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.db import ReadSessionLocal, get_async_db, get_async_read_db
+from models.models import PlacementData, PlacementScore, Dataset, DatasetProfile, User
 from auth.auth import get_current_user, require_role
-import pandas as pd
-import io
+from ml.runtime import get_pipeline, load_pipeline, model_lock, rescore
+from services.llm_cache import llm_cache
+from services import dataset_context, ingest
+from services.audit import audit_log
+from utils.metrics import time_phase
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
+import json
 
 router = APIRouter()
 
@@ -27,129 +35,182 @@ class DatasetResponse(BaseModel):
         from_attributes = True
 
 
+class PlacementRecord(BaseModel):
+    id: int
+    dataset_id: int
+    student_name: Optional[str]
+    gender: Optional[str]
+    age: Optional[int]
+    department: Optional[str]
+    batch_year: Optional[int]
+    cgpa: Optional[float]
+    backlogs: Optional[int]
+    internships: Optional[int]
+    projects: Optional[int]
+    skills: Optional[str]
+    certification_count: Optional[int]
+    aptitude_score: Optional[float]
+    communication_score: Optional[float]
+    placed: Optional[bool]
+    company_name: Optional[str]
+    salary: Optional[float]
+    placement_type: Optional[str]
+    created_at: Optional[datetime]
+
+
+# Selected as plain columns: no ORM identity map or instance state per row
+RECORD_COLUMNS = [getattr(PlacementData, name) for name in PlacementRecord.model_fields]
+
+
 @router.post("/upload")
 async def upload_csv(
+    request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    append_to: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are accepted")
 
+    # Lookups before the parse use the read session: the write session
+    # only takes a writer connection once the rows are ready to insert
+    dataset = stored_profile = None
+    if append_to is not None:
+        dataset = await read_db.get(Dataset, append_to)
+        if not dataset:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        if current_user.role != "admin" and dataset.uploaded_by != current_user.id:
+            raise HTTPException(status_code=403, detail="Insufficient permissions to append to this dataset")
+        # Appended rows are profiled into the dataset's stored profile
+        stored_profile = (await read_db.execute(
+            select(DatasetProfile).where(DatasetProfile.dataset_id == append_to)
+        )).scalar_one_or_none()
+        # Loaded attributes stay readable; the connection goes back to the pool
+        await read_db.close()
+
     contents = await file.read()
-    try:
-        df = pd.read_csv(io.BytesIO(contents))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading CSV: {str(e)}")
-
-    # Normalize column names handling duplicates
-    df.columns = df.columns.astype(str).str.strip().str.lower().str.replace(" ", "_")
-    df = df.loc[:, ~df.columns.duplicated()]
-
-    # Column aliases mapping
-    aliases_map = {
-        "student_name": ["name", "student", "candidate", "candidate_name"],
-        "department": ["branch", "stream", "dept", "course"],
-        "batch_year": ["batch", "year", "pass_out_year", "graduation_year"],
-        "cgpa": ["gpa", "grade", "marks", "score"],
-        "placed": ["status", "placement_status", "is_placed", "hired"],
-        "salary": ["package", "lpa", "ctc", "salary_in_lpa"],
-        "company_name": ["company", "employer", "hired_by", "organization", "placed_company"],
-        "skills": ["skill", "technical_skills", "core_skills", "technologies"],
-        "gender": ["sex"],
-        "certification_count": ["certifications", "certificate", "certs"],
-    }
+    with time_phase("ingest_parse"):
+        try:
+            df, profile = await run_in_threadpool(
+                ingest.read_csv, contents, _profile_state(stored_profile),
+            )
+        except ingest.IngestError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    for expected, aliases in aliases_map.items():
-        if expected not in df.columns:
-            for alias in aliases:
-                if alias in df.columns:
-                    df[expected] = df[alias]
-                    break
-
-    # Add missing optional columns as empty/default to ensure they exist
-    optional_defaults = {
-        "salary": 0, "cgpa": 0, "backlogs": 0, "internships": 0,
-        "projects": 0, "certification_count": 0, "aptitude_score": 0,
-        "communication_score": 0, "skills": "", "company_name": "",
-        "student_name": "Unknown", "gender": "Unknown",
-        "batch_year": 2024, "placement_type": "On-campus",
-        "age": 22
-    }
-    
-    for col, default_val in optional_defaults.items():
-        if col not in df.columns:
-            df[col] = default_val
-
-    # Check required columns
-    missing = [c for c in ["department", "placed"] if c not in df.columns]
-    if missing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Missing required columns: {missing}. Found: {list(df.columns)}",
+    # The dataset row, its records and its profile are committed together
+    if append_to is not None:
+        # Append a new batch of students to an existing dataset
+        version = dataset.version
+        counted = await db.execute(
+            update(Dataset).where(Dataset.id == append_to)
+            .values(record_count=func.coalesce(Dataset.record_count, 0) + len(df))
         )
+        if not counted.rowcount:
+            # Deleted while the file was being parsed
+            raise HTTPException(status_code=404, detail="Dataset not found")
+    else:
+        # Version dataset
+        existing = (await db.execute(
+            select(Dataset).where(Dataset.name == file.filename).limit(1)
+        )).scalar_one_or_none()
+        version = (existing.version + 1) if existing else 1
 
-    # Clean data: Replace NaN/null with defaults
-    df = df.drop_duplicates()
-    df = df.fillna(optional_defaults)
-
-    # Version dataset
-    existing = db.query(Dataset).filter(Dataset.name == file.filename).first()
-    version = (existing.version + 1) if existing else 1
-
-    dataset = Dataset(
-        name=file.filename,
-        version=version,
-        uploaded_by=current_user.id,
-        record_count=len(df),
-        description=f"Uploaded by {current_user.username}",
-    )
-    db.add(dataset)
-    db.commit()
-    db.refresh(dataset)
-
-    # Insert records
-    records = []
-    for _, row in df.iterrows():
-        record = PlacementData(
-            dataset_id=dataset.id,
-            student_name=str(row.get("student_name", "Unknown")),
-            gender=str(row.get("gender", "Unknown")),
-            age=int(row.get("age", 22)),
-            department=str(row.get("department", "")),
-            batch_year=int(row.get("batch_year", 2024)),
-            cgpa=float(row.get("cgpa", 0)),
-            backlogs=int(row.get("backlogs", 0)),
-            internships=int(row.get("internships", 0)),
-            projects=int(row.get("projects", 0)),
-            skills=str(row.get("skills", "")),
-            certification_count=int(row.get("certification_count", 0)),
-            aptitude_score=float(row.get("aptitude_score", 0)),
-            communication_score=float(row.get("communication_score", 0)),
-            placed=bool(row.get("placed", False)),
-            company_name=str(row.get("company_name", "")),
-            salary=float(row.get("salary", 0)),
-            placement_type=str(row.get("placement_type", "On-campus")),
+        dataset = Dataset(
+            name=file.filename,
+            version=version,
+            uploaded_by=current_user.id,
+            record_count=len(df),
+            description=f"Uploaded by {current_user.username}",
         )
-        records.append(record)
+        db.add(dataset)
+        await db.flush()
 
-    db.bulk_save_objects(records)
-    db.commit()
+    # Insert records
+    with time_phase("ingest_rows"):
+        records = await run_in_threadpool(ingest.placement_rows, df, dataset.id)
+    with time_phase("ingest_insert"):
+        if records:
+            await db.execute(insert(PlacementData), records)
+        if append_to is None:
+            db.add(DatasetProfile(
+                dataset_id=dataset.id,
+                summary=json.dumps(profile["summary"]),
+                sketches=json.dumps(profile["sketches"]),
+            ))
+        elif stored_profile is not None:
+            await db.execute(
+                update(DatasetProfile).where(DatasetProfile.dataset_id == append_to)
+                .values(summary=json.dumps(profile["summary"]), sketches=json.dumps(profile["sketches"]))
+            )
+        # Datasets uploaded before profiling have no profile to extend
+        await db.commit()
 
-    return {
+    response = {
         "message": "Upload successful",
         "dataset_id": dataset.id,
         "version": version,
         "records_inserted": len(records),
     }
+    await audit_log.record(
+        "upload", request, current_user,
+        dataset_id=dataset.id, filename=file.filename, records=len(records), append=append_to is not None,
+    )
+    dataset_context.invalidate(dataset.id)
+    if append_to is not None:
+        await run_in_threadpool(llm_cache.invalidate_dataset, dataset.id)
+    model_changed = False
+    if append_to is not None and (await load_pipeline()).supports_incremental(dataset.id):
+        async with model_lock:
+            with time_phase("ingest_model_update"):
+                response["model_update"] = await run_in_threadpool(_update_models, dataset.id)
+        model_changed = "error" not in response["model_update"]
+    # Rescored after a model update, or to add the appended students to
+    # scores that already exist
+    if append_to is not None and (model_changed or await _has_scores(read_db, dataset.id)):
+        background_tasks.add_task(rescore, dataset.id)
+    return response
+
+
+async def _has_scores(db: AsyncSession, dataset_id: int) -> bool:
+    return (await db.execute(
+        select(PlacementScore.id).where(PlacementScore.dataset_id == dataset_id).limit(1)
+    )).first() is not None
+
+
+def _profile_state(profile: Optional[DatasetProfile]) -> Optional[dict]:
+    if profile is None:
+        return None
+    return {"summary": json.loads(profile.summary), "sketches": json.loads(profile.sketches)}
+
+
+def _drop_artifacts(dataset_id: int):
+    from ml.loader import invalidate_snapshot
+    from ml.neighbors import drop_index
+    invalidate_snapshot(dataset_id)
+    drop_index(dataset_id)
+
+
+def _update_models(dataset_id: int) -> dict:
+    pipeline = get_pipeline()
+    db = ReadSessionLocal()
+    try:
+        with pipeline.training():
+            return pipeline.update_from_db(db, dataset_id)
+    finally:
+        db.close()
 
 
 @router.get("/datasets")
 async def list_datasets(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    datasets = db.query(Dataset).order_by(Dataset.uploaded_at.desc()).all()
+    datasets = (await db.execute(
+        select(Dataset).order_by(Dataset.uploaded_at.desc())
+    )).scalars().all()
     return [
         {
             "id": ds.id,
@@ -162,38 +223,69 @@ async def list_datasets(
     ]
 
 
-@router.get("/records/{dataset_id}")
+@router.get("/records/{dataset_id}", response_model=List[PlacementRecord])
 async def get_records(
     dataset_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    records = (
-        db.query(PlacementData)
-        .filter(PlacementData.dataset_id == dataset_id)
+    records = (await db.execute(
+        select(*RECORD_COLUMNS)
+        .where(PlacementData.dataset_id == dataset_id)
+        .order_by(PlacementData.id)
         .offset(skip)
         .limit(limit)
-        .all()
-    )
-    return records
+    )).mappings().all()
+    # The columns already have the schema's types, so the rows go straight
+    # to orjson; response_model only documents the shape
+    return ORJSONResponse([dict(r) for r in records])
+
+
+@router.get("/datasets/{dataset_id}/profile")
+async def get_dataset_profile(
+    dataset_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    summary = (await db.execute(
+        select(DatasetProfile.summary).where(DatasetProfile.dataset_id == dataset_id)
+    )).scalar_one_or_none()
+    if summary is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No profile for this dataset. Profiles are recorded when a dataset is uploaded.",
+        )
+    # Stored as JSON at ingest time, so it is sent without decoding
+    return Response(content=summary, media_type="application/json")
 
 
 @router.delete("/datasets/{dataset_id}")
 async def delete_dataset(
     dataset_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    dataset = await db.get(Dataset, dataset_id)
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
     if current_user.role != "admin" and dataset.uploaded_by != current_user.id:
         raise HTTPException(status_code=403, detail="Insufficient permissions to delete this dataset")
 
-    db.query(PlacementData).filter(PlacementData.dataset_id == dataset_id).delete()
-    db.delete(dataset)
-    db.commit()
+    await db.execute(delete(PlacementScore).where(PlacementScore.dataset_id == dataset_id))
+    await db.execute(delete(DatasetProfile).where(DatasetProfile.dataset_id == dataset_id))
+    await db.execute(delete(PlacementData).where(PlacementData.dataset_id == dataset_id))
+    await db.delete(dataset)
+    await db.commit()
+    await run_in_threadpool(_drop_artifacts, dataset_id)
+    await run_in_threadpool(llm_cache.invalidate_dataset, dataset_id)
+    dataset_context.invalidate(dataset_id)
+    pipeline = await load_pipeline()
+    if pipeline.published_dataset_id == dataset_id:
+        async with model_lock:
+            await run_in_threadpool(pipeline.forget_dataset, dataset_id)
+    await audit_log.record("delete_dataset", request, current_user, dataset_id=dataset_id, name=dataset.name)
     return {"message": "Dataset deleted"}
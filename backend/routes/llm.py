@@ -1,19 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
-from database.db import get_db
-from models.models import PlacementData, Dataset, User
+from database.db import ReadSessionLocal
+from models.models import User
 from auth.auth import get_current_user
+from services.ollama import get_ollama_client, ollama_status
+from services.llm_gateway import gateway, GatewayFull, Ticket, prompt_key
+from services.llm_cache import llm_cache
+from services.dataset_context import resolve_context
+from utils.metrics import time_phase
 import httpx
 import json
 
 router = APIRouter()
 
 
-OLLAMA_BASE_URL = "http://localhost:11434"
-
-
 class ChatRequest(BaseModel):
     message: str
     dataset_id: Optional[int] = None
@@ -23,65 +26,40 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     model: str
+    queue_position: int = 0
+    coalesced: bool = False
+    cached: bool = False
 
 
-def build_dataset_summary(records: list) -> str:
-    if not records:
-        return "No data available."
-
-    total = len(records)
-    placed = sum(1 for r in records if r.placed)
-    salaries = [r.salary for r in records if r.placed and r.salary and r.salary > 0]
-
-    depts = {}
-    for r in records:
-        d = r.department
-        if d not in depts:
-            depts[d] = {"total": 0, "placed": 0}
-        depts[d]["total"] += 1
-        if r.placed:
-            depts[d]["placed"] += 1
+GENERATION_OPTIONS = {
+    "temperature": 0.7,
+    "num_predict": 500,
+}
+QUEUE_POLL_INTERVAL = 1.0
 
-    dept_summary = ", ".join(
-        f"{d}: {v['placed']}/{v['total']} placed"
-        for d, v in sorted(depts.items())
-    )
 
-    summary = f"""Dataset Summary:
-- Total Students: {total}
-- Placed: {placed} ({round(placed/total*100, 1)}%)
-- Average Salary: {round(sum(salaries)/len(salaries), 2) if salaries else 0} LPA
-- Highest Salary: {max(salaries) if salaries else 0} LPA
-- Lowest Salary: {min(salaries) if salaries else 0} LPA
-- Department Breakdown: {dept_summary}
-"""
-    return summary
+async def get_dataset_summary(dataset_id: Optional[int], question: str) -> tuple:
+    # Cached until the dataset changes; building runs aggregate queries on the sync engine
+    return await run_in_threadpool(_dataset_summary, dataset_id, question)
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat_with_llm(
-    request: ChatRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    # Get dataset summary
+def _dataset_summary(dataset_id: Optional[int], question: str) -> tuple:
     dataset_summary = ""
+    ds_id = dataset_id
+    db = ReadSessionLocal()
     try:
-        ds_id = request.dataset_id
-        if ds_id is None:
-            ds = db.query(Dataset).order_by(Dataset.uploaded_at.desc()).first()
-            if ds:
-                ds_id = ds.id
-
-        if ds_id:
-            records = db.query(PlacementData).filter(
-                PlacementData.dataset_id == ds_id
-            ).all()
-            dataset_summary = build_dataset_summary(records)
+        ds_id, context = resolve_context(db, dataset_id)
+        if context is not None:
+            dataset_summary = context.select(question)
     except Exception:
         dataset_summary = "No dataset loaded."
+    finally:
+        db.close()
+    return ds_id, dataset_summary
 
-    system_prompt = f"""You are an AI placement analytics assistant. You help analyze student placement data and provide insights.
+
+def build_system_prompt(dataset_summary: str) -> str:
+    return f"""You are an AI placement analytics assistant. You help analyze student placement data and provide insights.
 You have access to the following dataset information:
 
 {dataset_summary}
@@ -90,59 +68,207 @@ Provide helpful, data-driven insights. Be concise and actionable. Format your re
 If asked about predictions or trends, use the data provided to give informed answers.
 Always be encouraging and constructive in your recommendations."""
 
+
+def build_generate_payload(request: ChatRequest, system_prompt: str, stream: bool) -> dict:
+    return {
+        "model": request.model,
+        "prompt": request.message,
+        "system": system_prompt,
+        "stream": stream,
+        "options": GENERATION_OPTIONS,
+    }
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat_with_llm(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+):
+    ds_id, dataset_summary = await get_dataset_summary(request.dataset_id, request.message)
+    key = prompt_key(request.model, request.message, GENERATION_OPTIONS, dataset_summary)
+    cached = await run_in_threadpool(llm_cache.get, key)
+    if cached is not None:
+        return ChatResponse(response=cached, model=request.model, cached=True)
+    if not ollama_status.allow_request():
+        return ChatResponse(
+            response=generate_fallback_response(request.message, dataset_summary),
+            model="fallback",
+        )
+
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json={
-                    "model": request.model,
-                    "prompt": request.message,
-                    "system": system_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "num_predict": 500,
-                    },
-                },
-            )
+        response, position, coalesced = await gateway.run(
+            key, lambda: generate_response(request, dataset_summary)
+        )
+    except GatewayFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    # Fallback and error answers are not worth keeping
+    if response.model == request.model and not coalesced:
+        await run_in_threadpool(llm_cache.put, key, ds_id, response.response)
+    return response.model_copy(update={"queue_position": position, "coalesced": coalesced})
 
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=503,
-                    detail="Ollama service not available. Make sure Ollama is running locally.",
-                )
 
-            result = response.json()
-            return ChatResponse(
-                response=result.get("response", "No response generated"),
-                model=request.model,
+async def generate_response(request: ChatRequest, dataset_summary: str) -> ChatResponse:
+    system_prompt = build_system_prompt(dataset_summary)
+    try:
+        with time_phase("ollama_generate"):
+            response = await get_ollama_client().post(
+                "/api/generate",
+                json=build_generate_payload(request, system_prompt, stream=False),
+            )
+
+        if response.status_code != 200:
+            ollama_status.record_failure()
+            raise HTTPException(
+                status_code=503,
+                detail="Ollama service not available. Make sure Ollama is running locally.",
             )
 
+        ollama_status.record_success()
+        result = response.json()
+        return ChatResponse(
+            response=result.get("response", "No response generated"),
+            model=request.model,
+        )
+
     except httpx.ConnectError:
+        ollama_status.record_failure()
         # Fallback: generate a basic response without LLM
         return ChatResponse(
             response=generate_fallback_response(request.message, dataset_summary),
             model="fallback",
         )
     except Exception as e:
+        if isinstance(e, httpx.TransportError):
+            ollama_status.record_failure()
         return ChatResponse(
             response=f"AI Assistant is currently unavailable. Please ensure Ollama is running (ollama serve). Error: {str(e)}",
             model="error",
         )
 
 
+class GatewayStream(StreamingResponse):
+    """Releases the gateway ticket however the response ends. The
+    generator's own ``finally`` never runs if the client goes away before
+    the body is first iterated, which would otherwise leak the slot."""
+
+    def __init__(self, content, ticket: Ticket, **kwargs):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ticket.release()
+
+
+def _encode_event(event: dict, fmt: str) -> str:
+    data = json.dumps(event)
+    return f"data: {data}\n\n" if fmt == "sse" else f"{data}\n"
+
+
+async def stream_generation(request: ChatRequest, dataset_summary: str, fmt: str,
+                            ticket: Ticket, key: str, ds_id: Optional[int]):
+    payload = build_generate_payload(request, build_system_prompt(dataset_summary), stream=True)
+    tokens = []
+    try:
+        while not await ticket.wait(QUEUE_POLL_INTERVAL):
+            yield _encode_event({"queued": ticket.position}, fmt)
+
+        with time_phase("ollama_stream"):
+            async with get_ollama_client().stream("POST", "/api/generate", json=payload) as response:
+                if response.status_code != 200:
+                    ollama_status.record_failure()
+                    yield _encode_event({
+                        "error": "Ollama service not available. Make sure Ollama is running locally.",
+                        "done": True,
+                    }, fmt)
+                    return
+
+                # If the client disconnects, Starlette cancels this generator at
+                # the next await; leaving the stream context then closes the
+                # upstream connection, which stops the Ollama generation.
+                ollama_status.record_success()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("response"):
+                        tokens.append(chunk["response"])
+                        yield _encode_event({"token": chunk["response"]}, fmt)
+                    if chunk.get("done"):
+                        await run_in_threadpool(llm_cache.put, key, ds_id, "".join(tokens))
+                        break
+        yield _encode_event({"done": True, "model": request.model, "cached": False}, fmt)
+
+    except httpx.ConnectError:
+        ollama_status.record_failure()
+        yield _encode_event({"token": generate_fallback_response(request.message, dataset_summary)}, fmt)
+        yield _encode_event({"done": True, "model": "fallback"}, fmt)
+    except httpx.HTTPError as e:
+        if isinstance(e, httpx.TransportError):
+            ollama_status.record_failure()
+        yield _encode_event({"error": f"AI Assistant is currently unavailable. Error: {str(e)}", "done": True}, fmt)
+    finally:
+        ticket.release()
+
+
+@router.post("/chat/stream")
+async def chat_with_llm_stream(
+    request: ChatRequest,
+    format: str = Query("sse", pattern="^(sse|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+):
+    ds_id, dataset_summary = await get_dataset_summary(request.dataset_id, request.message)
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    key = prompt_key(request.model, request.message, GENERATION_OPTIONS, dataset_summary)
+    cached = await run_in_threadpool(llm_cache.get, key)
+    if cached is not None:
+        return StreamingResponse(
+            iter([
+                _encode_event({"token": cached}, format),
+                _encode_event({"done": True, "model": request.model, "cached": True}, format),
+            ]),
+            media_type=media_type,
+        )
+    if not ollama_status.allow_request():
+        return StreamingResponse(
+            iter([
+                _encode_event({"token": generate_fallback_response(request.message, dataset_summary)}, format),
+                _encode_event({"done": True, "model": "fallback"}, format),
+            ]),
+            media_type=media_type,
+        )
+
+    try:
+        ticket = gateway.enqueue()
+    except GatewayFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return GatewayStream(
+        stream_generation(request, dataset_summary, format, ticket, key, ds_id),
+        ticket,
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/gateway")
+async def gateway_status(current_user: User = Depends(get_current_user)):
+    return {
+        **gateway.stats(),
+        "cache": await run_in_threadpool(llm_cache.stats),
+        "ollama": {
+            "available": ollama_status.available,
+            "breaker_open": ollama_status.breaker_open,
+            "consecutive_failures": ollama_status.failures,
+        },
+    }
+
+
 @router.get("/models")
 async def list_models():
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
-            if response.status_code == 200:
-                data = response.json()
-                models = [m["name"] for m in data.get("models", [])]
-                return {"models": models, "available": True}
-    except Exception:
-        pass
-    return {"models": [], "available": False}
+    return await ollama_status.models_snapshot()
 
 
 def generate_fallback_response(message: str, summary: str) -> str:
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
-from database.db import get_db
-from models.models import PlacementData, Dataset, User
-from auth.auth import get_current_user
-from ml.pipeline import pipeline
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Literal
+from database.db import ReadSessionLocal, SessionLocal, get_async_read_db
+from database.queries import latest_dataset_id
+from models.models import PlacementData, PlacementScore, User
+from auth.auth import get_current_user, require_role
+from ml.runtime import get_pipeline, load_pipeline, model_lock, rescore
+from services.audit import audit_log
+from utils.metrics import time_phase
 
 router = APIRouter()
 
@@ -22,61 +27,311 @@ class PredictionRequest(BaseModel):
     gender: str = "Male"
 
 
+class FeatureSweep(BaseModel):
+    feature: Literal[
+        "cgpa", "backlogs", "internships", "projects",
+        "certification_count", "aptitude_score", "communication_score",
+    ]
+    start: float = Field(allow_inf_nan=False)
+    stop: float = Field(allow_inf_nan=False)
+    step: float = Field(gt=0, allow_inf_nan=False)
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.stop < self.start:
+            raise ValueError("stop must not be less than start")
+        return self
+
+
+class WhatIfRequest(BaseModel):
+    profile: PredictionRequest
+    sweeps: List[FeatureSweep] = Field(min_length=1, max_length=2)
+
+
 @router.post("/train")
 async def train_models(
+    request: Request,
+    background_tasks: BackgroundTasks,
     dataset_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    mode: str = Query("full", pattern="^(full|incremental)$"),
+    placement_model: str = Query("logistic", pattern="^(logistic|sgd)$"),
+    tune: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
     if dataset_id is None:
-        ds = db.query(Dataset).order_by(Dataset.uploaded_at.desc()).first()
-        if not ds:
+        dataset_id = await latest_dataset_id(db)
+        if dataset_id is None:
             raise HTTPException(status_code=404, detail="No dataset found")
-        dataset_id = ds.id
 
-    records = db.query(PlacementData).filter(
-        PlacementData.dataset_id == dataset_id
-    ).all()
+    # Loading and fitting are synchronous and CPU bound
+    async with model_lock:
+        result = await run_in_threadpool(_train, dataset_id, mode, placement_model, tune)
+    # Stored scores are stale once a new model version is published
+    if mode == "full" or result["update"]["new_rows"]:
+        background_tasks.add_task(rescore, dataset_id)
+    await audit_log.record(
+        "train", request, current_user,
+        dataset_id=dataset_id, mode=mode, placement_model=placement_model, tune=tune,
+    )
+    return result
+
 
-    if len(records) < 20:
+def _train(dataset_id: int, mode: str, placement_model: str, tune: bool) -> dict:
+    pipeline = get_pipeline()
+    with pipeline.training():
+        if mode == "incremental":
+            db = ReadSessionLocal()
+            try:
+                with time_phase("train_incremental"):
+                    update = pipeline.update_from_db(db, dataset_id)
+            finally:
+                db.close()
+            if "error" in update:
+                raise HTTPException(status_code=400, detail=update["error"])
+            result = {"message": "Models updated incrementally", "update": update}
+        else:
+            _train_full(pipeline, dataset_id, placement_model, tune)
+            result = {"message": "Models trained successfully"}
+    # Reported from the version published on leaving training()
+    result["model_info"] = pipeline.get_model_info()
+    return result
+
+
+def _train_full(pipeline, dataset_id: int, placement_model: str, tune: bool):
+    db = ReadSessionLocal()
+    try:
+        with time_phase("train_load"):
+            data = pipeline.load_data(db, dataset_id)
+    finally:
+        db.close()
+
+    if data is None or len(data) < 20:
         raise HTTPException(
             status_code=400,
             detail="Need at least 20 records to train models",
         )
 
-    df = pipeline.prepare_data(records)
-    if df is None:
-        raise HTTPException(status_code=400, detail="Not enough valid data")
+    if tune:
+        with time_phase("train_tune"):
+            pipeline.tune_models(data, model_type=placement_model)
+    else:
+        # Tuned hyperparameters belong to the run and data they were tuned on
+        pipeline.clear_tuning()
 
-    pipeline.train_placement_model(df)
-    pipeline.train_salary_model(df)
-
-    return {
-        "message": "Models trained successfully",
-        "model_info": pipeline.get_model_info(),
-    }
+    with time_phase("train_placement"):
+        pipeline.train_placement_model(data, model_type=placement_model)
+    with time_phase("train_salary"):
+        pipeline.train_salary_model(data)
+    pipeline.dataset_id = dataset_id
+    with time_phase("train_index"):
+        pipeline.build_similarity_index(dataset_id, data)
 
 
 @router.post("/predict/placement")
 async def predict_placement(
     request: PredictionRequest,
+    http_request: Request,
+    explain: bool = False,
     current_user: User = Depends(get_current_user),
 ):
-    result = pipeline.predict_placement(request.model_dump())
+    pipeline = await load_pipeline()
+    result = pipeline.predict_placement(request.model_dump(), explain=explain)
+    await audit_log.record(
+        "predict_placement", http_request, current_user,
+        model_version=pipeline.model_version, prediction=result.get("prediction"),
+    )
     return result
 
 
 @router.post("/predict/salary")
 async def predict_salary(
     request: PredictionRequest,
+    http_request: Request,
+    explain: bool = False,
     current_user: User = Depends(get_current_user),
 ):
-    result = pipeline.predict_salary(request.model_dump())
+    pipeline = await load_pipeline()
+    result = pipeline.predict_salary(request.model_dump(), explain=explain)
+    await audit_log.record(
+        "predict_salary", http_request, current_user,
+        model_version=pipeline.model_version, predicted_salary=result.get("predicted_salary"),
+    )
     return result
 
 
+@router.post("/what-if")
+async def what_if(
+    request: WhatIfRequest,
+    current_user: User = Depends(get_current_user),
+):
+    pipeline = await load_pipeline()
+    result = await run_in_threadpool(
+        pipeline.what_if,
+        request.profile.model_dump(),
+        [sweep.model_dump() for sweep in request.sweeps],
+    )
+    if "error" in result and result["error"] != "Model not trained":
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@router.post("/similar")
+async def similar_students(
+    request: PredictionRequest,
+    dataset_id: Optional[int] = None,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    pipeline = await load_pipeline()
+    dataset_id = dataset_id or pipeline.published_dataset_id
+    if dataset_id is None:
+        raise HTTPException(status_code=404, detail="Model not trained")
+
+    # Already imported along with the pipeline
+    from ml.neighbors import get_index
+    index = get_index(dataset_id)
+    if index is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No similarity index for this dataset. Train the models on it first.",
+        )
+
+    ids, distances = index.query(request.model_dump(), k)
+    records = {
+        r.id: r for r in (await db.execute(
+            select(PlacementData).where(PlacementData.id.in_(ids.tolist()))
+        )).scalars()
+    }
+    return [
+        {
+            "id": r.id,
+            "distance": round(float(d), 4),
+            "department": r.department,
+            "batch_year": r.batch_year,
+            "cgpa": r.cgpa,
+            "backlogs": r.backlogs,
+            "internships": r.internships,
+            "projects": r.projects,
+            "certification_count": r.certification_count,
+            "aptitude_score": r.aptitude_score,
+            "communication_score": r.communication_score,
+            "placed": r.placed,
+            "company_name": r.company_name,
+            "salary": r.salary,
+        }
+        for r, d in ((records.get(int(i)), d) for i, d in zip(ids, distances))
+        if r is not None
+    ]
+
+
+def _score_query(dataset_id: int, department: Optional[str], batch_year: Optional[int]):
+    query = (
+        select(PlacementScore, PlacementData.student_name)
+        .join(PlacementData, PlacementData.id == PlacementScore.record_id)
+        .where(PlacementScore.dataset_id == dataset_id)
+    )
+    if department:
+        query = query.where(PlacementScore.department == department)
+    if batch_year:
+        query = query.where(PlacementScore.batch_year == batch_year)
+    return query
+
+
+def _score_row(score: PlacementScore, student_name: str) -> dict:
+    return {
+        "record_id": score.record_id,
+        "student_name": student_name,
+        "department": score.department,
+        "batch_year": score.batch_year,
+        "placed_probability": round(score.placed_probability, 2),
+        "predicted_salary": (
+            round(score.predicted_salary, 2) if score.predicted_salary is not None else None
+        ),
+        "percentile": round(score.percentile, 2),
+        "model_version": score.model_version,
+    }
+
+
+async def _resolve_dataset(db: AsyncSession, dataset_id: Optional[int]) -> int:
+    if dataset_id is not None:
+        return dataset_id
+    pipeline = await load_pipeline()
+    if pipeline.published_dataset_id is not None:
+        return pipeline.published_dataset_id
+    ds_id = await latest_dataset_id(db)
+    if ds_id is None:
+        raise HTTPException(status_code=404, detail="No dataset found")
+    return ds_id
+
+
+@router.post("/scores/run")
+async def run_scoring(
+    dataset_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(require_role(["admin", "analyst"])),
+):
+    pipeline = await load_pipeline()
+    if pipeline.shared is None:
+        raise HTTPException(status_code=400, detail="Model not trained")
+    dataset_id = await _resolve_dataset(db, dataset_id)
+    scored = await run_in_threadpool(_score, dataset_id)
+    return {"dataset_id": dataset_id, "records_scored": scored, "model_version": pipeline.model_version}
+
+
+def _score(dataset_id: int) -> int:
+    from ml.scoring import score_dataset
+    db = SessionLocal()
+    try:
+        return score_dataset(db, get_pipeline(), dataset_id)
+    finally:
+        db.close()
+
+
+@router.get("/scores/at-risk")
+async def get_at_risk_students(
+    dataset_id: Optional[int] = None,
+    department: Optional[str] = None,
+    batch_year: Optional[int] = None,
+    k: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(require_role(["admin", "analyst"])),
+):
+    dataset_id = await _resolve_dataset(db, dataset_id)
+    rows = (await db.execute(
+        _score_query(dataset_id, department, batch_year)
+        .order_by(PlacementScore.placed_probability.asc())
+        .limit(k)
+    )).all()
+    return [_score_row(score, name) for score, name in rows]
+
+
+@router.get("/scores/band")
+async def get_percentile_band(
+    lower: float = Query(0, ge=0, le=100),
+    upper: float = Query(10, ge=0, le=100),
+    dataset_id: Optional[int] = None,
+    department: Optional[str] = None,
+    batch_year: Optional[int] = None,
+    skip: int = 0,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(require_role(["admin", "analyst"])),
+):
+    dataset_id = await _resolve_dataset(db, dataset_id)
+    rows = (await db.execute(
+        _score_query(dataset_id, department, batch_year)
+        .where(PlacementScore.percentile > lower, PlacementScore.percentile <= upper)
+        .order_by(PlacementScore.placed_probability.asc())
+        .offset(skip)
+        .limit(limit)
+    )).all()
+    return [_score_row(score, name) for score, name in rows]
+
+
 @router.get("/model-info")
 async def get_model_info(
     current_user: User = Depends(get_current_user),
 ):
-    return pipeline.get_model_info()
+    return (await load_pipeline()).get_model_info()
@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Optional
+import asyncio
+import json
+import logging
+import os
+from fastapi import Request
+from sqlalchemy import insert
+from database.db import AsyncSessionLocal
+from models.models import AuditLog
+from utils.metrics import Counter
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+# "drop" discards new events while the queue is full; "block" makes the
+# request wait up to AUDIT_BLOCK_TIMEOUT for room before dropping
+AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "drop")
+AUDIT_BLOCK_TIMEOUT = float(os.getenv("AUDIT_BLOCK_TIMEOUT", "0.5"))
+
+logger = logging.getLogger(__name__)
+audit_events = Counter("audit_events_total", "Audit events by outcome.", ("outcome",))
+
+
+class AuditWriter:
+    """Queues audit events in memory and inserts them in batches from a
+    background task, so a request only pays for an enqueue."""
+
+    def __init__(self, max_queue: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL, policy: str = AUDIT_OVERFLOW_POLICY,
+                 block_timeout: float = AUDIT_BLOCK_TIMEOUT):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._batch = []
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._inflight is not None and not self._inflight.done():
+            await self._inflight
+        # Whatever was still being collected or queued goes out in one last pass
+        batch, self._batch = self._batch, []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await self._flush(batch)
+
+    async def record(self, action: str, request: Optional[Request] = None, user=None, **details):
+        if self._queue is None:
+            self._drop()
+            return
+        entry = {
+            "user_id": getattr(user, "id", None),
+            "action": action,
+            "details": json.dumps(details, default=str) if details else None,
+            "ip_address": request.client.host if request is not None and request.client else None,
+            "timestamp": datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except asyncio.QueueFull:
+            if self.policy != "block":
+                self._drop()
+                return
+        try:
+            await asyncio.wait_for(self._queue.put(entry), self.block_timeout)
+        except asyncio.TimeoutError:
+            self._drop()
+
+    def _drop(self):
+        self.dropped += 1
+        audit_events.inc(outcome="dropped")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self._queue.get())
+            # Collect until the batch is full or the oldest event has
+            # waited flush_interval
+            deadline = loop.time() + self.flush_interval
+            while len(self._batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._batch = self._batch, []
+            # Shielded so that shutdown does not abandon a batch mid-insert
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+
+    async def _flush(self, batch: list):
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(AuditLog), batch)
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to write %d audit events", len(batch))
+            self.failed += len(batch)
+            audit_events.inc(len(batch), outcome="failed")
+            return
+        self.written += len(batch)
+        audit_events.inc(len(batch), outcome="written")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "policy": self.policy,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+audit_log = AuditWriter()
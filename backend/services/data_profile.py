@@ -0,0 +1,185 @@
+"""Data quality profile of a dataset, built while its CSV is normalized.
+
+The profile records what normalization did to the data: nulls and the
+defaults filled in for them, dropped duplicate rows, and values outside
+plausible ranges. It also records distinct counts, min/max and
+histograms of the stored values. All of it comes from the frames ingest
+already holds and is stored per dataset, so serving it never rescans
+placement_data.
+
+Appended batches merge into the stored profile. Counts add up and
+histograms reuse the bins of the first batch. Distinct counts merge the
+value sets of low-cardinality columns, or the HyperLogLog registers of
+columns with more than PROFILE_EXACT_DISTINCT values.
+"""
+from typing import Optional
+import base64
+import math
+import os
+import numpy as np
+import pandas as pd
+from services.ingest import OPTIONAL_DEFAULTS, ROW_TYPES
+
+PROFILE_BINS = int(os.getenv("PROFILE_HISTOGRAM_BINS", "10"))
+PROFILE_EXACT_DISTINCT = int(os.getenv("PROFILE_EXACT_DISTINCT", "1000"))
+# 4096 registers: about 1.6% standard error in 4 KiB per column
+HLL_PRECISION = 12
+
+# Plausible ranges; values outside are counted, not changed
+VALUE_RANGES = {
+    "cgpa": (0, 10),
+    "salary": (0, None),
+    "aptitude_score": (0, 100),
+    "communication_score": (0, 100),
+    "backlogs": (0, None),
+    "internships": (0, None),
+    "projects": (0, None),
+    "certification_count": (0, None),
+}
+
+
+def _typed(series: pd.Series, kind) -> np.ndarray:
+    """The column as it is stored, vectorized; see ingest.ROW_TYPES."""
+    if kind is str:
+        return series.astype(str).to_numpy(dtype=object)
+    if kind is bool:
+        return series.astype(bool).to_numpy()
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+    # Non-numeric text fails row conversion later; it is left out here
+    values = values[~np.isnan(values)]
+    return np.trunc(values) if kind is int else values
+
+
+def _hash(values, kind) -> np.ndarray:
+    dtype = object if kind is str else bool if kind is bool else np.float64
+    return pd.util.hash_array(np.asarray(values, dtype=dtype))
+
+
+def _registers(hashes: np.ndarray) -> np.ndarray:
+    # Top bits pick the register; the rank is one more than the number
+    # of leading zeros in the next 32 bits
+    index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+    rest = (hashes << np.uint64(HLL_PRECISION)) >> np.uint64(32)
+    rank = np.where(rest == 0, 33, 32 - np.floor(np.log2(np.maximum(rest, 1))))
+    registers = np.zeros(2 ** HLL_PRECISION, dtype=np.uint8)
+    np.maximum.at(registers, index, rank.astype(np.uint8))
+    return registers
+
+
+def _estimate(registers: np.ndarray) -> int:
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(2.0 ** -registers.astype(np.float64))
+    zeros = int((registers == 0).sum())
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+def _distinct(values: np.ndarray, kind, base: Optional[dict]) -> dict:
+    unique = pd.unique(values)
+    if base is not None and "hll" in base:
+        registers = np.frombuffer(base64.b64decode(base["hll"]), dtype=np.uint8)
+        registers = np.maximum(registers, _registers(_hash(unique, kind)))
+    else:
+        if base is not None:
+            unique = pd.unique(np.concatenate([np.asarray(base["values"], dtype=unique.dtype), unique]))
+        if len(unique) <= PROFILE_EXACT_DISTINCT:
+            return {"values": unique.tolist()}
+        registers = _registers(_hash(unique, kind))
+    return {"hll": base64.b64encode(registers.tobytes()).decode()}
+
+
+def _histogram(values: np.ndarray, base: Optional[dict]) -> Optional[dict]:
+    if base is None:
+        if not len(values):
+            return None
+        counts, edges = np.histogram(values, bins=PROFILE_BINS)
+        return {"edges": edges.tolist(), "counts": counts.tolist(), "below": 0, "above": 0}
+    edges = np.asarray(base["edges"])
+    counts = np.histogram(values, bins=edges)[0]
+    return {
+        "edges": base["edges"],
+        "counts": (np.asarray(base["counts"]) + counts).tolist(),
+        "below": base["below"] + int((values < edges[0]).sum()),
+        "above": base["above"] + int((values > edges[-1]).sum()),
+    }
+
+
+def build(raw: pd.DataFrame, clean: pd.DataFrame, rows_read: int, absent: set,
+          sources: dict, base: Optional[dict] = None) -> dict:
+    """Profile of one ingested batch, merged into ``base`` when appending.
+
+    ``raw`` is the deduplicated frame before nulls were filled, ``clean``
+    the frame that is stored; ``absent`` are the columns the CSV lacked
+    and ``sources`` the alias each column was read from.
+    """
+    rows = len(clean)
+    base_summary = base["summary"] if base else {"columns": {}}
+    base_sketches = base["sketches"] if base else {}
+    nulls = raw[list(ROW_TYPES)].isna().sum()
+
+    columns, sketches = {}, {}
+    for name, kind in ROW_TYPES.items():
+        prev = base_summary["columns"].get(name, {})
+        prev_sketch = base_sketches.get(name)
+        source = None if name in absent else sources.get(name, name)
+        null_count = rows if name in absent else int(nulls[name])
+        # Only optional columns are filled; nulls in required ones are kept
+        defaulted = null_count if name in OPTIONAL_DEFAULTS else 0
+
+        values = _typed(clean[name], kind)
+        sketch = _distinct(values, kind, prev_sketch)
+        column = {
+            "sources": sorted(set(prev.get("sources", [])) | {source}, key=str),
+            "nulls": prev.get("nulls", 0) + null_count,
+            "defaulted": prev.get("defaulted", 0) + defaulted,
+        }
+        if kind in (int, float):
+            count = (prev_sketch or {}).get("count", 0) + len(values)
+            total = (prev_sketch or {}).get("sum", 0.0) + float(values.sum())
+            sketch.update(count=count, sum=total)
+            low, high = VALUE_RANGES.get(name, (None, None))
+            out_of_range = int(
+                ((values < low).sum() if low is not None else 0)
+                + ((values > high).sum() if high is not None else 0)
+            )
+            lows = [] if prev.get("min") is None else [prev["min"]]
+            highs = [] if prev.get("max") is None else [prev["max"]]
+            if len(values):
+                lows.append(float(values.min()))
+                highs.append(float(values.max()))
+            column.update(
+                min=min(lows, default=None),
+                max=max(highs, default=None),
+                mean=round(total / count, 4) if count else None,
+                out_of_range=prev.get("out_of_range", 0) + out_of_range,
+                valid_range=[low, high] if name in VALUE_RANGES else None,
+                histogram=_histogram(values, prev.get("histogram")),
+            )
+        columns[name] = column
+        sketches[name] = sketch
+
+    summary = {
+        "rows": base_summary.get("rows", 0) + rows,
+        "rows_read": base_summary.get("rows_read", 0) + rows_read,
+        "duplicate_rows": base_summary.get("duplicate_rows", 0) + rows_read - rows,
+        "batches": base_summary.get("batches", 0) + 1,
+        "columns": columns,
+    }
+    _add_rates(summary, sketches)
+    return {"summary": summary, "sketches": sketches}
+
+
+def _add_rates(summary: dict, sketches: dict):
+    rows = summary["rows"]
+    summary["duplicate_rate"] = round(summary["duplicate_rows"] / max(summary["rows_read"], 1), 4)
+    for name, column in summary["columns"].items():
+        sketch = sketches[name]
+        column["null_rate"] = round(column["nulls"] / max(rows, 1), 4)
+        column["defaulted_rate"] = round(column["defaulted"] / max(rows, 1), 4)
+        if "hll" in sketch:
+            registers = np.frombuffer(base64.b64decode(sketch["hll"]), dtype=np.uint8)
+            column["distinct"], column["distinct_method"] = _estimate(registers), "hyperloglog"
+        else:
+            column["distinct"], column["distinct_method"] = len(sketch["values"]), "exact"
@@ -0,0 +1,231 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import Session
+from database.queries import latest_dataset
+from models.models import PlacementData, Dataset
+import re
+import threading
+import os
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "400"))
+TOP_COMPANIES = 30
+TOP_SKILLS = 15
+
+_WORD = re.compile(r"[a-z0-9+#.]+")
+
+# dataset_id -> (signature, context); see _signature
+_contexts = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class Snippet:
+    kind: str
+    text: str
+    keywords: set = field(default_factory=set)
+
+    @property
+    def tokens(self) -> int:
+        # Roughly four characters per token for English prose and numbers
+        return len(self.text) // 4 + 1
+
+
+@dataclass
+class DatasetContext:
+    dataset_id: int
+    overview: Snippet
+    snippets: list
+
+    def select(self, question: str, budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+        words = set(_WORD.findall(question.lower()))
+        scored = [
+            (len(words & snippet.keywords), i, snippet)
+            for i, snippet in enumerate(self.snippets)
+        ]
+        relevant = [item for item in scored if item[0] > 0]
+        if not relevant:
+            # Nothing specific was asked: keep the old generic breakdown
+            relevant = [item for item in scored if item[2].kind == "departments"]
+
+        chosen = [self.overview]
+        used = self.overview.tokens
+        for _, _, snippet in sorted(relevant, key=lambda item: (-item[0], item[1])):
+            if used + snippet.tokens > budget:
+                continue
+            chosen.append(snippet)
+            used += snippet.tokens
+        return "\n".join(s.text for s in chosen)
+
+
+def _pct(part, total) -> float:
+    return round(part / total * 100, 1) if total else 0
+
+
+def _salary(value) -> float:
+    return round(float(value), 2) if value else 0
+
+
+def build_context(db: Session, dataset_id: int) -> DatasetContext:
+    pd_ = PlacementData
+    placed = case((pd_.placed == True, 1), else_=0)  # noqa: E712
+    paid = (pd_.placed == True) & (pd_.salary > 0)  # noqa: E712
+    paid_salary = case((paid, pd_.salary))
+
+    total, n_placed, avg_salary, max_salary, min_salary = db.execute(
+        select(func.count(pd_.id), func.sum(placed), func.avg(paid_salary),
+               func.max(paid_salary), func.min(paid_salary))
+        .where(pd_.dataset_id == dataset_id)
+    ).one()
+    total, n_placed = total or 0, n_placed or 0
+    if not total:
+        return DatasetContext(dataset_id, Snippet("overview", "No data available."), [])
+
+    overview = Snippet("overview", (
+        "Dataset Summary:\n"
+        f"- Total Students: {total}\n"
+        f"- Placed: {n_placed} ({_pct(n_placed, total)}%)\n"
+        f"- Average Salary: {_salary(avg_salary)} LPA\n"
+        f"- Highest Salary: {_salary(max_salary)} LPA\n"
+        f"- Lowest Salary: {_salary(min_salary)} LPA"
+    ))
+    snippets = []
+
+    depts = db.execute(
+        select(pd_.department, func.count(pd_.id), func.sum(placed), func.avg(paid_salary))
+        .where(pd_.dataset_id == dataset_id)
+        .group_by(pd_.department)
+        .order_by(pd_.department)
+    ).all()
+    snippets.append(Snippet(
+        "departments",
+        "- Department Breakdown: " + ", ".join(
+            f"{d}: {p or 0}/{n} placed ({_pct(p or 0, n)}%)" for d, n, p, _ in depts
+        ),
+        {"department", "departments", "dept", "branch", "branches", "weakest",
+         "strongest", "best", "worst", "compare", "comparison"},
+    ))
+    for d, n, p, avg in depts:
+        snippets.append(Snippet(
+            "department",
+            f"- {d}: {n} students, {p or 0} placed ({_pct(p or 0, n)}%), "
+            f"average package {_salary(avg)} LPA",
+            set(_WORD.findall(str(d).lower())),
+        ))
+
+    companies = db.execute(
+        select(pd_.company_name, func.count(pd_.id), func.avg(paid_salary), func.max(paid_salary))
+        .where(pd_.dataset_id == dataset_id, pd_.placed == True)  # noqa: E712
+        .group_by(pd_.company_name)
+        .order_by(func.count(pd_.id).desc())
+        .limit(TOP_COMPANIES)
+    ).all()
+    snippets.append(Snippet(
+        "companies",
+        "- Top Recruiters: " + ", ".join(
+            f"{c or 'Unknown'} ({n} offers, avg {_salary(avg)} LPA)" for c, n, avg, _ in companies[:10]
+        ),
+        {"company", "companies", "recruiter", "recruiters", "employer", "employers",
+         "hiring", "hire", "hired", "offers", "top"},
+    ))
+    for c, n, avg, top in companies:
+        snippets.append(Snippet(
+            "company",
+            f"- {c or 'Unknown'}: {n} offers, average {_salary(avg)} LPA, highest {_salary(top)} LPA",
+            set(_WORD.findall(str(c or "unknown").lower())),
+        ))
+
+    years = db.execute(
+        select(pd_.batch_year, func.count(pd_.id), func.sum(placed), func.avg(paid_salary))
+        .where(pd_.dataset_id == dataset_id)
+        .group_by(pd_.batch_year)
+        .order_by(pd_.batch_year)
+    ).all()
+    snippets.append(Snippet(
+        "years",
+        "- Yearly Trend: " + ", ".join(
+            f"{y}: {_pct(p or 0, n)}% placed, avg {_salary(avg)} LPA" for y, n, p, avg in years
+        ),
+        {"year", "years", "yearly", "batch", "batches", "trend", "trends", "growth",
+         "future", "predict", "history"},
+    ))
+    for y, n, p, avg in years:
+        snippets.append(Snippet(
+            "year",
+            f"- Batch {y}: {n} students, {p or 0} placed ({_pct(p or 0, n)}%), "
+            f"average package {_salary(avg)} LPA",
+            {str(y)},
+        ))
+
+    skill_counts = Counter()
+    skill_salary = Counter()
+    skill_paid = Counter()
+    rows = db.execute(
+        select(pd_.skills, pd_.salary, pd_.placed)
+        .where(pd_.dataset_id == dataset_id, pd_.skills != None, pd_.skills != "")  # noqa: E711
+        .execution_options(yield_per=5000)
+    )
+    for skills, salary, was_placed in rows:
+        for skill in {s.strip() for s in skills.split(",") if s.strip()}:
+            skill_counts[skill] += 1
+            if was_placed and salary and salary > 0:
+                skill_salary[skill] += salary
+                skill_paid[skill] += 1
+    if skill_counts:
+        top = skill_counts.most_common(TOP_SKILLS)
+        skill_words = set()
+        for skill, _ in top:
+            skill_words |= set(_WORD.findall(skill.lower()))
+        snippets.append(Snippet(
+            "skills",
+            "- Top Skills: " + ", ".join(
+                f"{s} ({n} students, avg {_salary(skill_salary[s] / max(skill_paid[s], 1))} LPA)"
+                for s, n in top
+            ),
+            {"skill", "skills", "technology", "technologies", "learn", "improve",
+             "demand", "suggest", "recommend"} | skill_words,
+        ))
+
+    return DatasetContext(dataset_id, overview, snippets)
+
+
+def resolve_context(db: Session, dataset_id: Optional[int] = None) -> tuple:
+    """``(dataset_id, context)`` for a dataset, by default the latest upload.
+
+    A chat message costs one single-row query on datasets, which finds the
+    latest upload and reads the signature the cached context is checked
+    against. record_count rises in the same commit as appended rows, and a
+    reused id gets a new uploaded_at, so a context changed by another
+    worker or by bulk_import.py is noticed without any cross-process
+    invalidation. Returns ``(None, None)`` when nothing was uploaded.
+    """
+    columns = (Dataset.id, Dataset.record_count, Dataset.uploaded_at)
+    query = (
+        latest_dataset(*columns) if dataset_id is None
+        else select(*columns).where(Dataset.id == dataset_id)
+    )
+    row = db.execute(query).one_or_none()
+    if row is None:
+        if dataset_id is None:
+            return None, None
+        signature = None
+    else:
+        dataset_id, signature = row[0], (row[1], row[2])
+    return dataset_id, _cached_context(db, dataset_id, signature)
+
+
+def _cached_context(db: Session, dataset_id: int, signature) -> DatasetContext:
+    entry = _contexts.get(dataset_id)
+    if entry is None or entry[0] != signature:
+        with _lock:
+            entry = _contexts.get(dataset_id)
+            if entry is None or entry[0] != signature:
+                entry = _contexts[dataset_id] = (signature, build_context(db, dataset_id))
+    return entry[1]
+
+
+def invalidate(dataset_id: int):
+    """Drop a context early; stale ones are also rebuilt on their next use."""
+    with _lock:
+        _contexts.pop(dataset_id, None)
@@ -0,0 +1,128 @@
+"""CSV normalization shared by the upload route and bulk_import.py.
+
+Column names are normalized and common aliases mapped onto the
+placement_data columns, missing optional columns get defaults, and rows
+are converted to the values inserted into placement_data. The same pass
+builds the dataset's data quality profile (see services.data_profile).
+pandas is imported on first use, like the rest of the heavy ingest stack.
+"""
+from typing import TYPE_CHECKING, Optional
+import io
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+REQUIRED_COLUMNS = ["department", "placed"]
+
+# Column aliases mapping
+ALIASES = {
+    "student_name": ["name", "student", "candidate", "candidate_name"],
+    "department": ["branch", "stream", "dept", "course"],
+    "batch_year": ["batch", "year", "pass_out_year", "graduation_year"],
+    "cgpa": ["gpa", "grade", "marks", "score"],
+    "placed": ["status", "placement_status", "is_placed", "hired"],
+    "salary": ["package", "lpa", "ctc", "salary_in_lpa"],
+    "company_name": ["company", "employer", "hired_by", "organization", "placed_company"],
+    "skills": ["skill", "technical_skills", "core_skills", "technologies"],
+    "gender": ["sex"],
+    "certification_count": ["certifications", "certificate", "certs"],
+}
+
+# Defaults for optional columns that are missing or empty
+OPTIONAL_DEFAULTS = {
+    "salary": 0, "cgpa": 0, "backlogs": 0, "internships": 0,
+    "projects": 0, "certification_count": 0, "aptitude_score": 0,
+    "communication_score": 0, "skills": "", "company_name": "",
+    "student_name": "Unknown", "gender": "Unknown",
+    "batch_year": 2024, "placement_type": "On-campus",
+    "age": 22,
+}
+
+# placement_data columns and the conversion applied to each value
+ROW_TYPES = {
+    "student_name": str, "gender": str, "age": int, "department": str,
+    "batch_year": int, "cgpa": float, "backlogs": int, "internships": int,
+    "projects": int, "skills": str, "certification_count": int,
+    "aptitude_score": float, "communication_score": float, "placed": bool,
+    "company_name": str, "salary": float, "placement_type": str,
+}
+
+
+class IngestError(ValueError):
+    pass
+
+
+def normalize_names(columns) -> list:
+    return [str(c).strip().lower().replace(" ", "_") for c in columns]
+
+
+def resolve_aliases(columns) -> dict:
+    """Expected column -> the normalized column it is read from."""
+    present = set(columns)
+    sources = {}
+    for expected, aliases in ALIASES.items():
+        if expected in present:
+            continue
+        for alias in aliases:
+            if alias in present:
+                sources[expected] = alias
+                break
+    return sources
+
+
+def missing_required(columns) -> list:
+    """Required columns that neither the header nor an alias provides."""
+    columns = normalize_names(columns)
+    available = set(columns) | set(resolve_aliases(columns))
+    return [c for c in REQUIRED_COLUMNS if c not in available]
+
+
+def read_csv(source, base_profile: Optional[dict] = None) -> tuple:
+    """Parse and normalize a CSV from bytes or a path.
+
+    Returns the frame and its profile, merged into ``base_profile`` when
+    the rows are appended to a profiled dataset.
+    """
+    import pandas as pd
+    try:
+        df = pd.read_csv(io.BytesIO(source) if isinstance(source, bytes) else source)
+    except Exception as e:
+        raise IngestError(f"Error reading CSV: {str(e)}")
+    return normalize(df, base_profile)
+
+
+def normalize(df: "pd.DataFrame", base_profile: Optional[dict] = None) -> tuple:
+    from services import data_profile
+
+    # Normalize column names handling duplicates
+    df.columns = normalize_names(df.columns)
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    sources = resolve_aliases(df.columns)
+    for expected, alias in sources.items():
+        df[expected] = df[alias]
+
+    # Add missing optional columns as empty/default to ensure they exist
+    absent = set()
+    for col, default_val in OPTIONAL_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default_val
+            absent.add(col)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise IngestError(f"Missing required columns: {missing}. Found: {list(df.columns)}")
+
+    # Clean data: Replace NaN/null with defaults
+    rows_read = len(df)
+    raw = df.drop_duplicates()
+    df = raw.fillna(OPTIONAL_DEFAULTS)
+    return df, data_profile.build(raw, df, rows_read, absent, sources, base_profile)
+
+
+def placement_rows(df: "pd.DataFrame", dataset_id: Optional[int]) -> list:
+    # Converted a column at a time; the same conversions per value as
+    # building each row from df.iterrows(), without a Series per row
+    columns = {name: list(map(kind, df[name].tolist())) for name, kind in ROW_TYPES.items()}
+    names = ["dataset_id", *columns]
+    return [dict(zip(names, values)) for values in zip([dataset_id] * len(df), *columns.values())]
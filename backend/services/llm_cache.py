@@ -0,0 +1,104 @@
+from typing import Optional
+import sqlite3
+import threading
+import time
+import os
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+
+class ResponseCache:
+    """LLM responses on local disk, expired by age and evicted least
+    recently used first once the entry limit is reached.
+
+    Every method does blocking sqlite3 I/O; async code calls them through
+    run_in_threadpool.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, dataset_id INTEGER, response TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_responses_dataset ON responses (dataset_id)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, dataset_id: Optional[int], response: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # One transaction, so one write to disk rather than three
+            conn.execute("BEGIN")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, dataset_id, response, now, now),
+                )
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def invalidate_dataset(self, dataset_id: int):
+        with self._lock:
+            self._connection().execute("DELETE FROM responses WHERE dataset_id = ?", (dataset_id,))
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+llm_cache = ResponseCache()
@@ -0,0 +1,138 @@
+from collections import deque
+from typing import Awaitable, Callable
+import asyncio
+import hashlib
+import json
+import os
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "8"))
+
+
+class GatewayFull(Exception):
+    pass
+
+
+class Ticket:
+    """A place in the gateway: either holding a generation slot or queued for one."""
+
+    def __init__(self, gateway: "LLMGateway", waiter=None):
+        self._gateway = gateway
+        self._waiter = waiter
+        self._released = False
+        self.queued_at = self.position
+
+    @property
+    def ready(self) -> bool:
+        return self._waiter is None or self._waiter.done()
+
+    @property
+    def position(self) -> int:
+        if self.ready:
+            return 0
+        return self._gateway._waiters.index(self._waiter) + 1
+
+    async def wait(self, timeout: float = None) -> bool:
+        if self.ready:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        if self.ready:
+            self._gateway._release()
+        else:
+            # Still queued: give up the place without ever holding a slot
+            self._gateway._waiters.remove(self._waiter)
+            self._waiter.cancel()
+
+    async def __aenter__(self):
+        try:
+            await self.wait()
+        except BaseException:
+            self.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters = deque()
+        self._inflight = {}
+        self.rejected = 0
+        self.coalesced = 0
+
+    def enqueue(self) -> Ticket:
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return Ticket(self)
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise GatewayFull(f"LLM queue is full ({self.max_queue} waiting)")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        return Ticket(self, waiter)
+
+    def _release(self):
+        # Hand the slot straight to the next waiter, so the active count
+        # only drops when nobody is queued
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def run(self, key: str, generate: Callable[[], Awaitable]):
+        """Run ``generate`` within a slot, sharing one call among identical
+        in-flight requests. Returns ``(result, queue_position, coalesced)``."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), 0, True
+
+        ticket = self.enqueue()
+
+        async def execute():
+            try:
+                async with ticket:
+                    return await generate()
+            finally:
+                self._inflight.pop(key, None)
+
+        # A separate task keeps the shared generation alive if the
+        # request that started it goes away
+        task = self._inflight[key] = asyncio.ensure_future(execute())
+        return await asyncio.shield(task), ticket.queued_at, False
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "in_flight_prompts": len(self._inflight),
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+        }
+
+
+def prompt_key(model: str, message: str, options: dict, context: str) -> str:
+    normalized = " ".join(message.lower().split())
+    raw = json.dumps([model, normalized, options, context], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+gateway = LLMGateway()
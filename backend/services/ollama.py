@@ -0,0 +1,153 @@
+from typing import Optional
+import asyncio
+import httpx
+import time
+import os
+from utils.metrics import time_phase
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+OLLAMA_MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "10"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))
+OLLAMA_POOL_TIMEOUT = float(os.getenv("OLLAMA_POOL_TIMEOUT", "30"))
+OLLAMA_MODELS_TTL = float(os.getenv("OLLAMA_MODELS_TTL", "30"))
+OLLAMA_PROBE_TIMEOUT = float(os.getenv("OLLAMA_PROBE_TIMEOUT", "2"))
+OLLAMA_FAILURE_THRESHOLD = int(os.getenv("OLLAMA_FAILURE_THRESHOLD", "3"))
+OLLAMA_BREAKER_COOLDOWN = float(os.getenv("OLLAMA_BREAKER_COOLDOWN", "30"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=OLLAMA_BASE_URL,
+        limits=httpx.Limits(
+            max_connections=OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=OLLAMA_MAX_KEEPALIVE,
+            keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            OLLAMA_READ_TIMEOUT,
+            connect=OLLAMA_CONNECT_TIMEOUT,
+            pool=OLLAMA_POOL_TIMEOUT,
+        ),
+    )
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    global _client
+    # Created lazily as well, for code paths that run without the app lifespan
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+class OllamaStatus:
+    """Last known model list and a circuit breaker for the Ollama server.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    callers skip Ollama; once ``cooldown`` has passed one call is let
+    through again, and any success (including a background probe) closes it.
+    """
+
+    def __init__(self, ttl: float = OLLAMA_MODELS_TTL,
+                 failure_threshold: int = OLLAMA_FAILURE_THRESHOLD,
+                 cooldown: float = OLLAMA_BREAKER_COOLDOWN):
+        self.ttl = ttl
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.models = []
+        self.available = False
+        self.checked_at = None
+        self.failures = 0
+        self.opened_at = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def stale(self) -> bool:
+        return self.checked_at is None or time.time() - self.checked_at > self.ttl
+
+    @property
+    def breaker_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow_request(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.time() - self.opened_at >= self.cooldown:
+            # Half-open: let this call probe, and hold the rest for another cooldown
+            self.opened_at = time.time()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.available = True
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.time()
+            self.available = False
+
+    async def refresh(self):
+        try:
+            with time_phase("ollama_tags"):
+                response = await get_ollama_client().get("/api/tags", timeout=OLLAMA_PROBE_TIMEOUT)
+            response.raise_for_status()
+            self.models = [m["name"] for m in response.json().get("models", [])]
+            self.record_success()
+        except Exception:
+            # A failed probe is enough to stop routing chats to Ollama
+            self.failures = max(self.failures + 1, self.failure_threshold)
+            self.opened_at = time.time()
+            self.available = False
+            self.models = []
+        self.checked_at = time.time()
+
+    def refresh_in_background(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self.refresh())
+        return self._refresh_task
+
+    async def models_snapshot(self) -> dict:
+        if self.checked_at is None:
+            # Nothing known yet: wait for the first probe, which is short
+            await asyncio.shield(self.refresh_in_background())
+        elif self.stale:
+            self.refresh_in_background()
+        return {
+            "models": self.models,
+            "available": self.available,
+            "checked_at": self.checked_at,
+            "breaker_open": self.breaker_open,
+        }
+
+
+ollama_status = OllamaStatus()
+_poller: Optional[asyncio.Task] = None
+
+
+async def _poll_models():
+    while True:
+        await ollama_status.refresh_in_background()
+        await asyncio.sleep(ollama_status.ttl)
+
+
+async def startup():
+    global _poller
+    get_ollama_client()
+    _poller = asyncio.ensure_future(_poll_models())
+
+
+async def shutdown():
+    global _client, _poller
+    if _poller is not None:
+        _poller.cancel()
+        _poller = None
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,34 @@
+"""Shared setup for the backend tests.
+
+The app reads its configuration from the environment at import time, so
+the database, artifact directories and caches are pointed at a
+temporary directory before any backend module is imported.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="placement-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ["ML_ARTIFACT_DIR"] = os.path.join(_TMP, "ml_artifacts")
+os.environ["LLM_CACHE_PATH"] = os.path.join(_TMP, "llm_cache.db")
+os.environ["DB_CREATE_ALL"] = "1"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db():
+    from database.db import Base, SessionLocal, engine
+    import models.models  # noqa: F401 - registers models
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
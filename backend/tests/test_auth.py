@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+from auth import auth
+import main
+
+
+def _client_and_headers():
+    client = TestClient(main.app)
+    client.__enter__()
+    r = client.post("/api/auth/register", json={
+        "username": "viewer1", "email": "viewer1@example.com",
+        "password": "secret", "full_name": "Viewer One", "role": "viewer",
+    })
+    if r.status_code != 200:
+        r = client.post("/api/auth/login", data={"username": "viewer1", "password": "secret"})
+    return client, {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_me_with_trusted_token_roles(monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_TRUST_TOKEN_ROLES", True)
+    client, headers = _client_and_headers()
+    try:
+        r = client.get("/api/auth/me", headers=headers)
+        assert r.status_code == 200
+        assert r.json()["email"] == "viewer1@example.com"
+        assert r.json()["full_name"] == "Viewer One"
+        assert r.json()["role"] == "viewer"
+
+        assert client.get("/api/auth/me", headers={"Authorization": "Bearer nope"}).status_code == 401
+    finally:
+        client.__exit__(None, None, None)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from services import data_profile, ingest
+
+
+def _hll_estimate(values: np.ndarray) -> int:
+    registers = data_profile._registers(data_profile._hash(values, str))
+    return data_profile._estimate(registers)
+
+
+def test_hll_estimate_within_error_bounds():
+    # Precision 12 has a standard error of about 1.6%; allow four of them
+    for n in (2000, 20000, 200000):
+        values = np.array([f"student-{i}" for i in range(n)], dtype=object)
+        assert abs(_hll_estimate(values) - n) / n < 0.065
+
+
+def test_hll_registers_merge_like_a_union():
+    first = np.array([f"s{i}" for i in range(30000)], dtype=object)
+    second = np.array([f"s{i}" for i in range(15000, 45000)], dtype=object)
+    merged = np.maximum(
+        data_profile._registers(data_profile._hash(first, str)),
+        data_profile._registers(data_profile._hash(second, str)),
+    )
+    assert abs(data_profile._estimate(merged) - 45000) / 45000 < 0.065
+
+
+def _frame(n: int, offset: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "name": [f"student-{offset + i}" for i in range(n)],
+        "branch": ["CSE", "ECE", "IT", None] * (n // 4),
+        "cgpa": np.linspace(5, 11, n),
+        "placed": [True, False] * (n // 2),
+    })
+
+
+def test_profile_counts_and_append_merge():
+    df, profile = ingest.normalize(_frame(2000))
+    columns = profile["summary"]["columns"]
+
+    assert profile["summary"]["rows"] == 2000
+    assert columns["department"]["sources"] == ["branch"]
+    assert columns["department"]["nulls"] == 500
+    assert columns["salary"]["defaulted"] == 2000
+    assert columns["cgpa"]["out_of_range"] == int((df["cgpa"] > 10).sum())
+    assert columns["student_name"]["distinct_method"] == "hyperloglog"
+    assert columns["placed"]["distinct"] == 2
+
+    _, merged = ingest.normalize(_frame(2000, offset=1000), profile)
+    summary = merged["summary"]
+    assert summary["rows"] == 4000
+    assert summary["batches"] == 2
+    assert summary["columns"]["cgpa"]["histogram"]["edges"] == columns["cgpa"]["histogram"]["edges"]
+    assert sum(summary["columns"]["cgpa"]["histogram"]["counts"]) == 4000
+    assert abs(summary["columns"]["student_name"]["distinct"] - 3000) / 3000 < 0.065
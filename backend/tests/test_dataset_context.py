@@ -0,0 +1,45 @@
+from sqlalchemy import event
+from database.db import SessionLocal, engine
+from models.models import Dataset, PlacementData
+from services.dataset_context import resolve_context
+
+
+def _add(db, dataset_id: int, n: int):
+    for i in range(n):
+        db.add(PlacementData(dataset_id=dataset_id, department="CSE", placed=i % 2 == 0, salary=6))
+    dataset = db.get(Dataset, dataset_id)
+    dataset.record_count = (dataset.record_count or 0) + n
+    db.commit()
+
+
+def test_context_follows_changes_made_elsewhere(db):
+    assert resolve_context(db) == (None, None)
+    dataset = Dataset(name="ctx.csv", version=1, record_count=0)
+    db.add(dataset)
+    db.commit()
+    _add(db, dataset.id, 10)
+
+    ds_id, context = resolve_context(db)
+    assert ds_id == dataset.id
+    assert "Total Students: 10" in context.overview.text
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert resolve_context(db)[1] is context
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) == 1
+
+    # Written by another session, as another worker or bulk_import.py
+    # would, without any in-process invalidation
+    other = SessionLocal()
+    try:
+        _add(other, dataset.id, 5)
+    finally:
+        other.close()
+    assert "Total Students: 15" in resolve_context(db, dataset.id)[1].overview.text
@@ -0,0 +1,27 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from ml.explain import FlatForest
+
+
+def _forest():
+    rng = np.random.default_rng(7)
+    X = rng.normal(size=(400, 9))
+    y = 3 * X[:, 0] - 2 * X[:, 3] + rng.normal(scale=0.1, size=len(X))
+    forest = RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+    return forest, rng.normal(size=(250, 9))
+
+
+def test_flat_forest_matches_sklearn():
+    forest, X = _forest()
+    flat = FlatForest.from_forest(forest)
+
+    np.testing.assert_allclose(flat.predict(X), forest.predict(X), rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(flat.predict(X[:1]), forest.predict(X[:1]), rtol=1e-10, atol=1e-10)
+
+
+def test_flat_forest_survives_array_round_trip():
+    forest, X = _forest()
+    flat = FlatForest.from_forest(forest)
+    restored = FlatForest(flat.arrays, X.shape[1])
+
+    np.testing.assert_allclose(restored.predict(X), forest.predict(X), rtol=1e-10, atol=1e-10)
@@ -0,0 +1,42 @@
+import asyncio
+from services.llm_gateway import LLMGateway
+
+
+def test_cancelled_queued_request_gives_up_its_place():
+    async def scenario():
+        gateway = LLMGateway(max_concurrency=1, max_queue=2)
+        holder = gateway.enqueue()
+        queued = gateway.enqueue()
+        waiting = asyncio.ensure_future(queued.__aenter__())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert gateway.stats()["queued"] == 0
+
+        holder.release()
+        assert gateway.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_run_releases_slot():
+    async def scenario():
+        gateway = LLMGateway(max_concurrency=1, max_queue=1)
+        started = asyncio.Event()
+
+        async def generate():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = asyncio.ensure_future(gateway.run("key", generate))
+        await started.wait()
+        assert gateway.stats()["active"] == 1
+        # run() shields the shared generation; cancelling it is what a
+        # shutdown does
+        for inflight in list(gateway._inflight.values()):
+            inflight.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert gateway.stats()["active"] == 0
+        assert gateway.stats()["in_flight_prompts"] == 0
+
+    asyncio.run(scenario())
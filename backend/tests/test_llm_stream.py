@@ -0,0 +1,54 @@
+import asyncio
+import httpx
+from routes import llm
+from routes.llm import GatewayStream
+from services import ollama
+from services.llm_gateway import LLMGateway
+
+
+def test_stream_releases_ticket_when_body_never_starts():
+    async def scenario():
+        gateway = LLMGateway(max_concurrency=1, max_queue=1)
+        ticket = gateway.enqueue()
+
+        async def body():
+            try:
+                yield "token"
+            finally:
+                ticket.release()
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            raise OSError("client went away")
+
+        try:
+            await GatewayStream(body(), ticket)({"type": "http"}, receive, send)
+        except OSError:
+            pass
+        assert gateway.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_error_status_counts_against_the_breaker(monkeypatch):
+    client = httpx.AsyncClient(
+        base_url="http://ollama.test",
+        transport=httpx.MockTransport(lambda request: httpx.Response(500, text="model not loaded")),
+    )
+    monkeypatch.setattr(llm, "get_ollama_client", lambda: client)
+    status = ollama.OllamaStatus()
+    monkeypatch.setattr(llm, "ollama_status", status)
+
+    async def scenario():
+        gateway = LLMGateway(max_concurrency=1, max_queue=1)
+        request = llm.ChatRequest(message="hello")
+        events = [e async for e in llm.stream_generation(
+            request, "", "ndjson", gateway.enqueue(), "key", None,
+        )]
+        assert '"error"' in events[-1]
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert status.failures == 1
@@ -0,0 +1,92 @@
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from models.models import Dataset, PlacementData
+from ml.loader import load_training_arrays
+
+DEPARTMENTS = ["CSE", "ECE", None, "Mech", "CSE", "IT", "ECE", None, "Civil", "IT"]
+GENDERS = ["Male", "Female", "Female", None, "Male", "Other", "Male", "Female", None, "Male"]
+
+
+def _add_rows(db, dataset_id, departments, genders):
+    for i, (dept, gender) in enumerate(zip(departments, genders)):
+        db.add(PlacementData(
+            dataset_id=dataset_id, department=dept, gender=gender,
+            cgpa=6 + i % 4, backlogs=i % 2, placed=i % 3 != 0, salary=4.5 * (i % 3),
+        ))
+    db.commit()
+
+
+def _dataset(db) -> int:
+    dataset = Dataset(name="test.csv", version=1, record_count=0)
+    db.add(dataset)
+    db.commit()
+    return dataset.id
+
+
+def _label_encode(values):
+    encoder = LabelEncoder()
+    codes = encoder.fit_transform([v or "Unknown" for v in values])
+    return encoder, codes
+
+
+def test_full_load_matches_label_encoder(db):
+    dataset_id = _dataset(db)
+    _add_rows(db, dataset_id, DEPARTMENTS, GENDERS)
+
+    data = load_training_arrays(db, dataset_id, use_snapshot=False)
+
+    le_dept, dept_codes = _label_encode(DEPARTMENTS)
+    le_gender, gender_codes = _label_encode(GENDERS)
+    assert list(data.department_classes) == list(le_dept.classes_)
+    assert list(data.gender_classes) == list(le_gender.classes_)
+    np.testing.assert_array_equal(data.X[:, -2], dept_codes)
+    np.testing.assert_array_equal(data.X[:, -1], gender_codes)
+    assert data.unseen == {}
+
+
+def test_snapshot_round_trip(db):
+    dataset_id = _dataset(db)
+    _add_rows(db, dataset_id, DEPARTMENTS, GENDERS)
+
+    first = load_training_arrays(db, dataset_id)
+    second = load_training_arrays(db, dataset_id)
+
+    np.testing.assert_array_equal(first.X, second.X)
+    np.testing.assert_array_equal(first.ids, second.ids)
+    assert list(first.department_classes) == list(second.department_classes)
+
+
+def test_incremental_load_uses_fixed_classes(db):
+    dataset_id = _dataset(db)
+    _add_rows(db, dataset_id, DEPARTMENTS, GENDERS)
+    full = load_training_arrays(db, dataset_id, use_snapshot=False)
+    le_dept, _ = _label_encode(DEPARTMENTS)
+    le_gender, _ = _label_encode(GENDERS)
+
+    appended = ["IT", "CSE", None, "Mech"]
+    _add_rows(db, dataset_id, appended, ["Male", None, "Female", "Other"])
+    delta = load_training_arrays(
+        db, dataset_id, min_id=int(full.ids.max()),
+        department_classes=full.department_classes, gender_classes=full.gender_classes,
+    )
+
+    assert len(delta) == len(appended)
+    np.testing.assert_array_equal(delta.X[:, -2], le_dept.transform([v or "Unknown" for v in appended]))
+    np.testing.assert_array_equal(
+        delta.X[:, -1], le_gender.transform(["Male", "Unknown", "Female", "Other"]),
+    )
+    assert list(delta.department_classes) == list(full.department_classes)
+
+
+def test_incremental_load_reports_unseen_categories(db):
+    dataset_id = _dataset(db)
+    _add_rows(db, dataset_id, DEPARTMENTS, GENDERS)
+    full = load_training_arrays(db, dataset_id, use_snapshot=False)
+
+    _add_rows(db, dataset_id, ["Aero", "CSE"], ["Male", "Male"])
+    delta = load_training_arrays(
+        db, dataset_id, min_id=int(full.ids.max()),
+        department_classes=full.department_classes, gender_classes=full.gender_classes,
+    )
+
+    assert delta.unseen == {"department": ["Aero"]}
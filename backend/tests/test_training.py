@@ -0,0 +1,56 @@
+import numpy as np
+from models.models import Dataset, PlacementData
+from ml import pipeline as pipeline_module
+from ml.runtime import get_pipeline
+from routes.ml import _train
+
+TUNED_SALARY = {"n_estimators": 20, "max_depth": 4}
+
+
+def _dataset(db, n: int = 120) -> int:
+    dataset = Dataset(name="train.csv", version=1, record_count=n)
+    db.add(dataset)
+    db.commit()
+    rng = np.random.default_rng(dataset.id)
+    for i in range(n):
+        placed = bool(rng.random() < 0.6)
+        db.add(PlacementData(
+            dataset_id=dataset.id, department=["CSE", "ECE", "IT"][i % 3], gender=["Male", "Female"][i % 2],
+            cgpa=float(rng.uniform(5, 10)), aptitude_score=float(rng.uniform(30, 100)),
+            placed=placed, salary=float(rng.uniform(3, 20)) if placed else 0,
+        ))
+    db.commit()
+    return dataset.id
+
+
+def test_untuned_run_drops_earlier_tuning(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "tune_placement_model", lambda data, model_type: {"params": {"C": 0.5}})
+    monkeypatch.setattr(pipeline_module, "tune_salary_model", lambda data: {"params": dict(TUNED_SALARY)})
+    first, second = _dataset(db), _dataset(db)
+
+    tuned = _train(first, "full", "logistic", True)["model_info"]
+    assert tuned["tuning"] is not None
+    assert get_pipeline().salary_params == TUNED_SALARY
+
+    plain = _train(second, "full", "logistic", False)["model_info"]
+    assert plain["tuning"] is None
+    assert get_pipeline().salary_params == pipeline_module.SALARY_DEFAULT_PARAMS
+    assert get_pipeline().placement_params == {}
+
+
+def test_published_dataset_unchanged_while_training(db, monkeypatch):
+    first, second = _dataset(db), _dataset(db)
+    _train(first, "full", "logistic", False)
+    pipeline = get_pipeline()
+    seen = []
+    train_salary_model = pipeline.train_salary_model
+
+    def observe(data):
+        seen.append(pipeline.published_dataset_id)
+        return train_salary_model(data)
+
+    monkeypatch.setattr(pipeline, "train_salary_model", observe)
+    _train(second, "full", "logistic", False)
+
+    assert seen == [first]
+    assert pipeline.published_dataset_id == second
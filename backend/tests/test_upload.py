@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from database.db import AsyncSessionLocal, get_async_db
+from services import ingest
+import main
+
+CSV = (
+    "name,branch,cgpa,placed,salary\n"
+    + "".join(f"s{i},{'CSE' if i % 2 else 'ECE'},{6 + i % 4},{i % 3 != 0},{4 * (i % 3)}\n" for i in range(40))
+).encode()
+
+
+def test_append_parses_before_taking_a_write_connection(monkeypatch):
+    events = []
+
+    async def write_db():
+        async with AsyncSessionLocal() as db:
+            event.listen(db.sync_session, "after_begin", lambda *args: events.append("write"))
+            yield db
+
+    read_csv = ingest.read_csv
+
+    def parse(*args):
+        events.append("parse")
+        return read_csv(*args)
+
+    monkeypatch.setattr(ingest, "read_csv", parse)
+    main.app.dependency_overrides[get_async_db] = write_db
+    try:
+        with TestClient(main.app) as client:
+            r = client.post("/api/auth/register", json={
+                "username": "uploader", "email": "uploader@example.com", "password": "secret",
+            })
+            if r.status_code != 200:
+                r = client.post("/api/auth/login", data={"username": "uploader", "password": "secret"})
+            headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+            r = client.post("/api/data/upload", headers=headers, files={"file": ("a.csv", CSV, "text/csv")})
+            assert r.status_code == 200
+            dataset_id = r.json()["dataset_id"]
+
+            events.clear()
+            r = client.post(
+                f"/api/data/upload?append_to={dataset_id}", headers=headers,
+                files={"file": ("a.csv", CSV, "text/csv")},
+            )
+            assert r.status_code == 200
+            assert events[0] == "parse"
+            assert "write" in events
+
+            datasets = {d["id"]: d for d in client.get("/api/data/datasets", headers=headers).json()}
+            assert datasets[dataset_id]["record_count"] == 80
+            profile = client.get(f"/api/data/datasets/{dataset_id}/profile", headers=headers).json()
+            assert profile["rows"] == 80
+    finally:
+        main.app.dependency_overrides.pop(get_async_db, None)
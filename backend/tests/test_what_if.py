@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+from ml.pipeline import WHAT_IF_MAX_POINTS, _sweep_points, pipeline
+import main
+
+PROFILE = {"cgpa": 7.5, "department": "CSE", "gender": "Male"}
+
+
+def test_sweep_points_include_stop():
+    assert _sweep_points({"start": 0, "stop": 1, "step": 0.25}) == 5
+    assert _sweep_points({"start": 6, "stop": 9, "step": 0.1}) == 31
+    assert _sweep_points({"start": 0, "stop": 1, "step": 0.3}) == 4
+
+
+def test_oversized_grid_rejected_before_allocating():
+    # 1e12 points; building the axis first would raise MemoryError
+    sweeps = [{"feature": "cgpa", "start": 0, "stop": 1e9, "step": 0.001}]
+    result = pipeline.what_if(PROFILE, sweeps)
+    assert result == {"error": f"Sweep grid has more than {WHAT_IF_MAX_POINTS} points"}
+
+    sweeps = [
+        {"feature": "cgpa", "start": 0, "stop": 10, "step": 0.1},
+        {"feature": "aptitude_score", "start": 0, "stop": 100, "step": 1},
+    ]
+    assert "error" in pipeline.what_if(PROFILE, sweeps)
+
+
+def test_reversed_sweep_is_a_validation_error():
+    with TestClient(main.app) as client:
+        r = client.post("/api/auth/register", json={
+            "username": "whatif", "email": "whatif@example.com", "password": "secret",
+        })
+        if r.status_code != 200:
+            r = client.post("/api/auth/login", data={"username": "whatif", "password": "secret"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        r = client.post("/api/ml/what-if", headers=headers, json={
+            "profile": PROFILE,
+            "sweeps": [{"feature": "cgpa", "start": 9, "stop": 5, "step": 0.5}],
+        })
+        assert r.status_code == 422
+        r = client.post("/api/ml/what-if", headers=headers, json={
+            "profile": PROFILE,
+            "sweeps": [{"feature": "cgpa", "start": 0, "stop": 1e9, "step": 0.001}],
+        })
+        assert r.status_code == 400
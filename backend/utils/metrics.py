@@ -0,0 +1,225 @@
+"""Request, database and phase metrics rendered in the Prometheus text format."""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import math
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from utils.profiler import profiler
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PHASE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Requests slower than this are profiled when METRICS_PROFILE_SLOW_MS > 0
+METRICS_PROFILE_SLOW_MS = float(os.getenv("METRICS_PROFILE_SLOW_MS", "0"))
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts, sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time until the response body was fully sent.",
+    ("method", "route", "status"),
+)
+db_queries_total = Counter("db_queries_total", "SQL statements executed.")
+db_query_duration = Histogram("db_query_duration_seconds", "Time spent in a single SQL statement.")
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements issued while serving a request.",
+    ("route",), buckets=QUERY_COUNT_BUCKETS,
+)
+db_query_seconds_per_request = Histogram(
+    "db_query_seconds_per_request", "Time spent in SQL while serving a request.", ("route",),
+)
+phase_duration = Histogram(
+    "phase_duration_seconds", "Duration of ingestion, training and Ollama phases.",
+    ("phase",), buckets=PHASE_BUCKETS,
+)
+profiles_written = Counter("profiles_written_total", "Slow request profiles written to disk.")
+
+# Per-request query stats; worker threads started with run_in_threadpool
+# copy the context, so the same dict is shared with them
+_request_stats: ContextVar[Optional[dict]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def time_phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_duration.observe(time.perf_counter() - start, phase=name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_queries_total.inc()
+    db_query_duration.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+        stats["seconds"] += elapsed
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def instrument_sqlalchemy():
+    """Count and time statements on every engine, sync and async."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """Records latency and SQL usage per route template.
+
+    Latency is taken when the last body chunk is sent, so background tasks
+    that Starlette runs after the response do not count against the route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route_template(self, scope) -> str:
+        if self._routes is None:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        # The router stores the matched endpoint in the shared scope; paths
+        # that match nothing share one label to keep cardinality bounded
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = {"queries": 0, "seconds": 0.0}
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        window = {"status": 500, "end": None}
+
+        def record():
+            window["end"] = time.perf_counter()
+            route = self._route_template(scope)
+            http_request_duration.observe(
+                window["end"] - start, method=scope["method"], route=route, status=str(window["status"]),
+            )
+            db_queries_per_request.observe(stats["queries"], route=route)
+            db_query_seconds_per_request.observe(stats["seconds"], route=route)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                window["status"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body") and window["end"] is None:
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            if window["end"] is None:
+                record()
+
+        elapsed_ms = (window["end"] - start) * 1000
+        if profiler.running and elapsed_ms >= METRICS_PROFILE_SLOW_MS:
+            label = f'{scope["method"]} {self._route_template(scope)}'
+            if await run_in_threadpool(profiler.dump, label, start, window["end"]):
+                profiles_written.inc()
@@ -0,0 +1,88 @@
+"""Opt-in sampling profiler that writes folded stacks for slow requests.
+
+A daemon thread samples every thread's Python stack into a ring buffer.
+When a request is slower than METRICS_PROFILE_SLOW_MS, the samples taken
+during its lifetime are written to METRICS_PROFILE_DIR in the folded
+format read by flamegraph.pl and speedscope. Samples are process wide, so
+a profile also shows whatever else ran concurrently with the request.
+"""
+from collections import Counter, deque
+import os
+import re
+import sys
+import threading
+import time
+
+METRICS_PROFILE_INTERVAL_MS = float(os.getenv("METRICS_PROFILE_INTERVAL_MS", "5"))
+METRICS_PROFILE_BUFFER = int(os.getenv("METRICS_PROFILE_BUFFER", "20000"))
+METRICS_PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR", "./profiles")
+
+# Leaf frames of threads that are parked rather than working: the event
+# loop waiting in select and pool workers waiting for a job
+IDLE_LEAVES = {("selectors.py", "select"), ("threading.py", "wait"), ("thread.py", "_worker")}
+
+
+def _frame_name(frame) -> str:
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = METRICS_PROFILE_INTERVAL_MS / 1000,
+                 buffer_size: int = METRICS_PROFILE_BUFFER, output_dir: str = METRICS_PROFILE_DIR):
+        self.interval = interval
+        self.output_dir = output_dir
+        # (timestamp, folded stack) pairs; deque appends are thread safe
+        self.samples = deque(maxlen=buffer_size)
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                self.samples.append((now, ";".join(reversed(stack))))
+
+    def dump(self, label: str, start: float, end: float) -> bool:
+        """Write the samples taken between start and end; False if there were none."""
+        stacks = Counter(stack for ts, stack in list(self.samples) if start <= ts <= end)
+        if not stacks:
+            return False
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")
+        path = os.path.join(
+            self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{int((end - start) * 1000)}ms.folded"
+        )
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return True
+
+
+profiler = SamplingProfiler()